@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 
 import argparse
-import json
 import logging
 import threading
 import time
@@ -62,8 +61,6 @@ class DroneHelper:
       except zmq.error.Again:
         continue # timeout: no message received; try again
 
-      msg = json.loads(msg)
-
       fcn = dss.auxiliaries.zmq.get_fcn(msg)
       if fcn in self._commands:
         try:
@@ -75,7 +72,6 @@ class DroneHelper:
       else:
         answer = dss.auxiliaries.zmq.nack(fcn, 'request is not supported')
 
-      answer = json.dumps(answer)
       self._rep_socket.send_json(answer)
 
     self._main_thread = None
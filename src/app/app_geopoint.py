@@ -131,7 +131,6 @@ class AppGeo():
     while self.alive:
       try:
         msg = self._app_socket.recv_json()
-        msg = json.loads(msg)
         fcn = msg['fcn'] if 'fcn' in msg else ''
 
         if fcn in self._commands:
@@ -139,7 +138,6 @@ class AppGeo():
           answer = request(msg)
         else:
           answer = dss.auxiliaries.zmq.nack(msg['fcn'], 'Request not supported')
-        answer = json.dumps(answer)
         self._app_socket.send_json(answer)
       except:
         pass
@@ -19,7 +19,6 @@ This application
 
 import argparse
 import copy
-import json
 import logging
 import sys
 import threading
@@ -168,7 +167,6 @@ class AppLmd():
     while self.alive:
       try:
         msg = self._app_socket.recv_json()
-        msg = json.loads(msg)
         fcn = msg['fcn'] if 'fcn' in msg else ''
 
         if fcn in self._commands:
@@ -176,7 +174,6 @@ class AppLmd():
           answer = request(msg)
         else:
           answer = dss.auxiliaries.zmq.nack(msg['fcn'], 'Request not supported')
-        answer = json.dumps(answer)
         self._app_socket.send_json(answer)
       except:
         pass
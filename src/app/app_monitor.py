@@ -7,7 +7,6 @@ import threading
 import time
 import traceback
 import sys
-import json
 import zmq
 import math
 
@@ -61,6 +60,8 @@ class Monitor():
                       'get_drone_data':   {'request': self._request_get_drone_data}}
     # Register with CRM (self.crm.app_id is first available after the register call)
     _ = self.crm.register(self._app_ip, self._app_socket.port)
+    # the main loop polls the client list, only fetch it when it changed
+    self.crm.subscribe_events()
 
     # Update socket labels with received id
     self._app_socket.add_id_to_label(self.crm.app_id)
@@ -109,7 +110,6 @@ class Monitor():
     while self.alive:
       try:
         msg = self._app_socket.recv_json()
-        msg = json.loads(msg)
         fcn = msg['fcn'] if 'fcn' in msg else ''
 
         if fcn in self._commands:
@@ -117,7 +117,6 @@ class Monitor():
           answer = request(msg)
         else:
           answer = dss.auxiliaries.zmq.nack(msg['fcn'], 'Request not supported')
-        answer = json.dumps(answer)
         self._app_socket.send_json(answer)
       except:
         pass
@@ -11,7 +11,6 @@ This application
 '''
 
 import argparse
-import json
 import logging
 import sys
 import threading
@@ -182,7 +181,6 @@ class AppNoise():
     while self.alive:
       try:
         msg = self._app_socket.recv_json()
-        msg = json.loads(msg)
         fcn = msg['fcn'] if 'fcn' in msg else ''
 
         if fcn in self._commands:
@@ -190,7 +188,6 @@ class AppNoise():
           answer = request(msg)
         else:
           answer = dss.auxiliaries.zmq.nack(msg['fcn'], 'Request not supported')
-        answer = json.dumps(answer)
         self._app_socket.send_json(answer)
       except:
         pass
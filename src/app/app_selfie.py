@@ -7,7 +7,6 @@ This app connects to CRM and receives an app_id.
 '''
 
 import argparse
-import json
 import logging
 import sys
 import threading
@@ -137,7 +136,6 @@ class Selfie():
     while self.alive:
       try:
         msg = self._app_socket.recv_json()
-        msg = json.loads(msg)
         fcn = msg['fcn'] if 'fcn' in msg else ''
 
         if fcn in self._commands:
@@ -145,7 +143,6 @@ class Selfie():
           answer = request(msg)
         else :
           answer = dss.auxiliaries.zmq.nack(msg['fcn'], 'Request not supported')
-        answer = json.dumps(answer)
         self._app_socket.send_json(answer)
       except:
         pass
@@ -2,7 +2,6 @@
 '''SRTL'''
 
 import argparse
-import json
 import logging
 import time
 import traceback
@@ -76,8 +75,6 @@ class AppClient:
       except zmq.error.Again:
         continue # timeout: no message received; try again
 
-      msg = json.loads(msg)
-
       fcn = dss.auxiliaries.zmq.get_fcn(msg)
       if fcn in self._commands:
         try:
@@ -88,7 +85,6 @@ class AppClient:
       else:
         answer = dss.auxiliaries.zmq.nack(fcn, 'request is not supported')
 
-      answer = json.dumps(answer)
       self._app_socket.send_json(answer)
 
     # unregister APP from CRM
@@ -11,7 +11,6 @@
 
 import argparse
 import datetime
-import json
 import logging
 import math
 import sys
@@ -562,8 +561,6 @@ class TYRApp:
           self.kill() # unregister, close, CRM will take care of the drones!
         continue # timeout: no message received; try again
 
-      msg = json.loads(msg)
-
       fcn = dss.auxiliaries.zmq.get_fcn(msg)
       if fcn in self._commands:
         try:
@@ -575,7 +572,6 @@ class TYRApp:
       else:
         answer = dss.auxiliaries.zmq.nack(fcn, 'request is not supported')
 
-      answer = json.dumps(answer)
       self._app_socket.send_json(answer)
 
     # unregister APP from CRM
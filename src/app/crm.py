@@ -6,6 +6,7 @@ import json
 import logging
 import subprocess
 import traceback
+import uuid
 
 import zmq
 
@@ -19,6 +20,14 @@ __version__ = '1.2.8'
 __copyright__ = 'Copyright (c) 2021-2022, RISE'
 __status__ = 'development'
 
+# The version of the client list is published right after it changed,
+# and at least once per interval so that subscribers see that the CRM
+# is alive. It is '<epoch>.<counter>', with an epoch that is new for
+# every CRM start, and changes with any client field except the
+# timestamp. The list itself is not published, subscribers fetch it
+# with a clients request.
+_CLIENTS_PUB_INTERVAL = 1.0 # seconds
+
 #--------------------------------------------------------------------#
 
 class CRM:
@@ -28,6 +37,7 @@ class CRM:
     assert dss.auxiliaries.zmq.valid_ip(ip), f'bad ip address: {ip}'
 
     self._commands = {'app_lost':            self._request_app_lost,
+                      'batch':               self._request_batch,
                       'clients':             self._request_clients,
                       'delStaleClients':     self._request_delStaleClients,
                       'get_drone':           self._request_get_drone,
@@ -47,6 +57,10 @@ class CRM:
 
     self._alive = True
     self._clients = {}
+    self._clients_state = None
+    self._clients_tick = 0.0
+    self._clients_epoch = uuid.uuid4().hex[:8]
+    self._clients_version = 0
     self._context = dss.auxiliaries.zmq.Context()
     self._ip = ip
     self._nextIndex = 1
@@ -144,10 +158,9 @@ class CRM:
         msg = self._socket.recv_json()
       except zmq.error.Again as error:
         self.delStaleClients()
+        self._publish_clients()
         continue # timeout: no message received; try again
 
-      msg = json.loads(msg)
-
       fcn = dss.auxiliaries.zmq.get_fcn(msg)
       if fcn in self._commands:
         if 'id' in msg:
@@ -164,8 +177,8 @@ class CRM:
       else:
         answer = dss.auxiliaries.zmq.nack(fcn, 'request is not supported')
 
-      answer = json.dumps(answer)
       self._socket.send_json(answer)
+      self._publish_clients()
 
     self._main_thread = None
 
@@ -183,6 +196,20 @@ class CRM:
 
     return clientsToDelete
 
+  def _publish_clients(self):
+    '''Publishes the version of the client list if it changed or the
+    interval passed, so that apps only request the list when it changed'''
+    # copied, tasks in the task queue may change the clients meanwhile.
+    # The timestamp is left out, it changes with every request.
+    state = [(id_, {key: value for key, value in client.items() if key != 'timestamp'}) for id_, client in list(self._clients.items())]
+    if state != self._clients_state:
+      self._clients_state = state
+      self._clients_version += 1
+    elif self._now - self._clients_tick < _CLIENTS_PUB_INTERVAL:
+      return
+    self._clients_tick = self._now
+    self._pub_socket.publish('clients', {'version': f'{self._clients_epoch}.{self._clients_version}'})
+
   def _export_clients(self):
     backup = {'nextIndex': self._nextIndex, 'clients': self._clients}
     with open('clients.json', 'w') as file:
@@ -224,6 +251,29 @@ class CRM:
 
     return dss.auxiliaries.zmq.ack(fcn)
 
+  def _request_batch(self, msg: dict) -> dict:
+    '''Handles several requests in one round-trip. The replies are
+    returned in the order of the calls.'''
+    fcn = dss.auxiliaries.zmq.get_fcn(msg)
+
+    # check arguments
+    if not all(key in msg for key in ['id', 'calls']) or not isinstance(msg['calls'], list):
+      return dss.auxiliaries.zmq.nack(fcn, 'bad arguments: {id, calls} are mandatory')
+
+    replies = list()
+    for call in msg['calls']:
+      call_fcn = dss.auxiliaries.zmq.get_fcn(call) if isinstance(call, dict) else None
+      if call_fcn == fcn or call_fcn not in self._commands:
+        replies.append(dss.auxiliaries.zmq.nack(call_fcn, 'request is not supported'))
+        continue
+      try:
+        replies.append(self._commands[call_fcn](call))
+      except:
+        self._logger.error(f'unexpected exception\n{traceback.format_exc()}')
+        replies.append(dss.auxiliaries.zmq.nack(call_fcn, 'unexpected exception'))
+
+    return dss.auxiliaries.zmq.ack(fcn, {'replies': replies})
+
   def _request_clients(self, msg: dict) -> dict:
     fcn = dss.auxiliaries.zmq.get_fcn(msg)
 
@@ -5,7 +5,6 @@
 '''
 
 import argparse
-import json
 
 import zmq
 
@@ -24,9 +23,7 @@ def receive_and_reply(socket):
     _print('recv: ' + str(error))
     return
 
-  # answer = msg
-  answer = json.loads(msg)
-  answer = json.dumps(answer)
+  answer = msg
 
   try:
     socket.send_json(answer)
@@ -7,7 +7,6 @@ This app connects to CRM and receives an app_id.
 '''
 
 import argparse
-import json
 import logging
 import sys
 import threading
@@ -130,7 +129,6 @@ class Template():
     while self.alive:
       try:
         msg = self._app_socket.recv_json()
-        msg = json.loads(msg)
         fcn = msg['fcn'] if 'fcn' in msg else ''
 
         if fcn in self._commands:
@@ -138,7 +136,6 @@ class Template():
           answer = request(msg)
         else :
           answer = dss.auxiliaries.zmq.nack(msg['fcn'], 'Request not supported')
-        answer = json.dumps(answer)
         self._app_socket.send_json(answer)
       except:
         pass
@@ -7,8 +7,10 @@ This app is used to verify functionality on the Ardupilot DSS
 '''
 
 import argparse
-import json
+import collections
+import dataclasses
 import logging
+import math
 import sys
 import threading
 import time
@@ -16,6 +18,12 @@ import traceback
 import numpy as np
 import zmq
 
+try:
+  from numba import njit
+except ImportError:
+  def njit(*_args, **_kwargs):
+    return lambda fcn: fcn
+
 import dss.auxiliaries
 import dss.client
 
@@ -40,44 +48,52 @@ _context = zmq.Context()
 #
 # #--------------------------------------------------------------------#
 #--------------------------------------------------------------------#
-class Waypoint():
-  def __init__(self):
-    self.lat = 0.0
-    self.lon = 0.0
-    self.alt = 0.0
-
-  def set_lla(self, lat, lon, alt):
-    self.lat = lat
-    self.lon = lon
-    self.alt = alt
-
-  def copy_lla(self, other_wp):
-    self.lat = other_wp.lat
-    self.lon = other_wp.lon
-    self.alt = other_wp.alt
+# Immutable, a new position is swapped in with a single assignment
+Waypoint = collections.namedtuple('Waypoint', ['lat', 'lon', 'alt'], defaults=[0.0, 0.0, 0.0])
+
 
 def ne_to_ll(loc1, d_northing, d_easting):
+  '''Legacy helper, generate_wps() inlines the conversion'''
   d_lat = d_northing/(1852*60)
   d_lon = d_easting/(1852*60*np.cos(loc1.lat/180*np.pi))
   return (d_lat, d_lon)
 
-def get_3d_distance(loc1, loc2):
-  dlat = loc2.lat - loc1.lat
-  dlon = loc2.lon - loc1.lon
-  dalt = loc2.alt - loc1.alt
+@njit(cache=True, fastmath=True)
+def _dist_kernel(lat1, lon1, alt1, lat2, lon2, alt2):
+  dlat = lat2 - lat1
+  dlon = lon2 - lon1
+  dalt = alt2 - alt1
 
   # Convert to meters
   d_northing = dlat * 1852 * 60
-  d_easting = dlon *1852 * 60 * np.cos(loc1.lat/180*np.pi)
+  d_easting = dlon * 1852 * 60 * math.cos(lat1/180*math.pi)
 
   # Calc distances
-  d_2d = np.sqrt(d_northing**2 + d_easting**2)
-  d_3d = np.sqrt(d_northing**2 + d_easting**2 + dalt**2)
+  d_2d = math.sqrt(d_northing**2 + d_easting**2)
+  d_3d = math.sqrt(d_northing**2 + d_easting**2 + dalt**2)
 
   # Calc bearing
-  bearing = np.arctan2(d_easting, d_northing)
+  bearing = math.atan2(d_easting, d_northing)
   return (d_northing, d_easting, dalt, d_2d, d_3d, bearing)
 
+def get_3d_distance(loc1, loc2):
+  return _dist_kernel(loc1.lat, loc1.lon, loc1.alt, loc2.lat, loc2.lon, loc2.alt)
+
+@dataclasses.dataclass(frozen=True)
+class VerifyConfig:
+  '''Constant mission parameters of app_verify'''
+  #geofence parameters
+  delta_r_max: float = 50.0
+  height_max: float = 30.0
+  height_min: float = 8.0
+  #take-off height
+  takeoff_height: float = 12.0
+  wp_height: float = 20.0
+  #Parameters for generate_random_wp()
+  default_speed: float = 3.0
+  #distance between waypoints
+  wp_dist: float = 20.0
+
 class AppVerify():
   def __init__(self, app_ip, app_id, crm):
     # Create Client object
@@ -102,6 +118,12 @@ class AppVerify():
     # Pub: APP -> ANY
     self._info_socket = dss.auxiliaries.zmq.Pub(_context, label='info', min_port=self.crm.port, max_port=self.crm.port+50)
 
+    # get_info answer, constant once registered with the CRM
+    self._get_info_answer = None
+
+    # Supported commands from ANY to APP
+    self._commands = {'get_info':     self._request_get_info}
+
     # Start the app reply thread
     self._app_reply_thread = threading.Thread(target=self._main_app_reply, daemon=True)
     self._app_reply_thread.start()
@@ -117,21 +139,10 @@ class AppVerify():
     self._app_socket.add_id_to_label(self.crm.app_id)
     self._info_socket.add_id_to_label(self.crm.app_id)
 
-    # Supported commands from ANY to APP
-    self._commands = {'get_info':     {'request': self._request_get_info}}
+    self._get_info_answer = self._request_get_info({'fcn': 'get_info'})
     self.init_pos_received = False
     self.drone_pos = Waypoint()
-    #geofence parameters
-    self.delta_r_max = 50.0
-    self.height_max = 30.0
-    self.height_min = 8.0
-    #take-off height
-    self.takeoff_height = 12.0
-    self.wp_height = 20.0
-    #Parameters for generate_random_wp()
-    self.default_speed = 3.0
-    #distance between waypoints
-    self.wp_dist = 20.0
+    self.cfg = VerifyConfig()
 
 #--------------------------------------------------------------------#
   @property
@@ -171,20 +182,29 @@ class AppVerify():
   def _main_app_reply(self):
     _logger.info(f'Reply socket is listening on: {self._app_socket.port}')
     while self.alive:
+      if not self._app_socket.poll(500):
+        continue
+      fcn = ''
       try:
         msg = self._app_socket.recv_json()
-        msg = json.loads(msg)
-        fcn = msg['fcn'] if 'fcn' in msg else ''
-
-        if fcn in self._commands:
-          request = self._commands[fcn]['request']
-          answer = request(msg)
-        else :
-          answer = dss.auxiliaries.zmq.nack(msg['fcn'], 'Request not supported')
-        answer = json.dumps(answer)
+        fcn = msg.get('fcn', '')
+
+        if fcn == 'get_info' and self._get_info_answer:
+          answer = self._get_info_answer
+        else:
+          handler = self._commands.get(fcn)
+          if handler is None:
+            answer = dss.auxiliaries.zmq.nack(fcn, 'Request not supported')
+          else:
+            answer = handler(msg)
+      except Exception:
+        # The rep socket must always answer to stay in sync
+        _logger.error(traceback.format_exc())
+        answer = dss.auxiliaries.zmq.nack(fcn if isinstance(fcn, str) else '', 'Request failed')
+      try:
         self._app_socket.send_json(answer)
-      except:
-        pass
+      except zmq.error.ZMQError:
+        _logger.error(traceback.format_exc())
     self._app_socket.close()
     _logger.info("Reply socket closed, thread exit")
 
@@ -227,20 +247,27 @@ class AppVerify():
     # Enable LLA stream
     self.drone._dss.data_stream('LLA', True)
     # Create info socket and start listening thread
-    info_socket = dss.auxiliaries.zmq.Sub(_context, ip, port, "info " + self.crm.app_id)
+    info_socket = dss.auxiliaries.zmq.Sub(_context, ip, port, label="info " + self.crm.app_id, subscribe_all=False)
+    # Only LLA is handled, let zmq drop everything else. The trailing
+    # space separates the topic from the payload (see zmq.mogrify)
+    info_socket.subscribe(b'LLA ')
     while self._dss_info_thread_active:
+      if not info_socket.poll(500):
+        continue
       try:
         (topic, msg) = info_socket.recv()
-        if topic == "LLA":
-          self.drone_pos.lat = msg['lat']
-          self.drone_pos.lon = msg['lon']
-          self.drone_pos.alt = msg['alt']
-          if not self.init_pos_received:
-            self.init_pos_received = True
-        else:
-          _logger.warning("Topic not recognized on info link "+topic)
-      except:
-        pass
+      except zmq.error.Again:
+        continue
+      if topic == "LLA":
+        try:
+          self.drone_pos = Waypoint(msg['lat'], msg['lon'], msg['alt'])
+        except KeyError:
+          _logger.error(f'Bad LLA message on info link: {msg}')
+          continue
+        if not self.init_pos_received:
+          self.init_pos_received = True
+      else:
+        _logger.warning("Topic not recognized on info link "+topic)
     info_socket.close()
     _logger.info("Stopped thread and closed info socket")
 
@@ -251,20 +278,26 @@ class AppVerify():
     # Create info socket and start listening thread
     data_socket = dss.auxiliaries.zmq.Sub(_context, ip, port, "data " + self.crm.app_id)
     while self._dss_data_thread_active:
+      if not data_socket.poll(500):
+        continue
       try:
         (topic, msg) = data_socket.recv()
-        if topic in ('photo', 'photo_low'):
+      except zmq.error.Again:
+        continue
+      if topic in ('photo', 'photo_low'):
+        try:
           data = dss.auxiliaries.zmq.string_to_bytes(msg["photo"])
           photo_filename = msg['metadata']['filename']
           dss.auxiliaries.zmq.bytes_to_image(photo_filename, data)
           json_filename = photo_filename[:-4] + ".json"
           dss.auxiliaries.zmq.save_json(json_filename, msg['metadata'])
-          print("Photo saved to " + msg['metadata']['filename']  + "\r")
-          print("Photo metadata saved to " + json_filename + "\r")
-        else:
-          print("Topic not recognized on data link: ", (topic, msg))
-      except:
-        pass
+        except (KeyError, OSError):
+          _logger.error(traceback.format_exc())
+          continue
+        print("Photo saved to " + msg['metadata']['filename']  + "\r")
+        print("Photo metadata saved to " + json_filename + "\r")
+      else:
+        print("Topic not recognized on data link: ", (topic, msg))
     data_socket.close()
     _logger.info("Stopped thread and closed data socket")
 
@@ -287,7 +320,7 @@ class AppVerify():
     # Setup info stream to DSS
     self.setup_dss_info_stream()
     self.drone.try_set_init_point()
-    self.drone.set_geofence(max(2, self.height_min-2), self.height_max+2, self.delta_r_max+10)
+    self.drone.set_geofence(max(2, self.cfg.height_min-2), self.cfg.height_max+2, self.cfg.delta_r_max+10)
 
   def task_await_init_point(self):
     # Wait until info stream up and running
@@ -304,9 +337,13 @@ class AppVerify():
   def generate_wps(self, n_wps, random=False):
     #Compute distance from start position
     mission = {}
-    current_wp = Waypoint()
-    current_wp.copy_lla(self.drone_pos)
-    for wp_id in range(0, n_wps):
+    current_wp = self.drone_pos
+    # Meters per degree latitude and cos of the reference latitude. The
+    # reference is only moved if the mission drifts more than 0.01 deg.
+    inv_mn = 1.0/(1852*60)
+    lat_ref = current_wp.lat
+    cos_lat_ref = math.cos(lat_ref/180*math.pi)
+    for wp_id in range(n_wps):
       if random:
         delta_dir = np.random.uniform(-np.pi, np.pi)
       else:
@@ -315,19 +352,20 @@ class AppVerify():
         elif wp_id == 1:
           delta_dir = 315.0*np.pi/180
       #Compute new lat lon
-      d_northing = self.wp_dist*np.cos(delta_dir)
-      d_easting = self.wp_dist*np.sin(delta_dir)
-      (d_lat, d_lon) = ne_to_ll(current_wp, d_northing, d_easting)
-      new_lat = current_wp.lat + d_lat
-      new_lon = current_wp.lon + d_lon
+      d_northing = self.cfg.wp_dist*np.cos(delta_dir)
+      d_easting = self.cfg.wp_dist*np.sin(delta_dir)
+      if abs(current_wp.lat - lat_ref) > 0.01:
+        lat_ref = current_wp.lat
+        cos_lat_ref = math.cos(lat_ref/180*math.pi)
+      new_lat = current_wp.lat + d_northing*inv_mn
+      new_lon = current_wp.lon + d_easting*inv_mn/cos_lat_ref
       # Compute new altitude (stay on the same)
-      #new_height = self.height_min + 0.5*(self.height_max-self.height_min)
-      new_height = self.wp_height
-      current_wp.set_lla(new_lat, new_lon, new_height)
+      #new_height = self.cfg.height_min + 0.5*(self.cfg.height_max-self.cfg.height_min)
+      new_height = self.cfg.wp_height
+      current_wp = Waypoint(new_lat, new_lon, new_height)
 
-      id_str = "id%d" % wp_id
-      mission[id_str] = {
-        "lat" : new_lat, "lon": new_lon, "alt": new_height, "alt_type": "relative", "heading": "course", "speed": self.default_speed
+      mission[f'id{wp_id}'] = {
+        "lat" : new_lat, "lon": new_lon, "alt": new_height, "alt_type": "relative", "heading": "course", "speed": self.cfg.default_speed
       }
 
     return mission
@@ -383,7 +421,7 @@ class AppVerify():
     self.task_generate_mission(n_wps=2)
     # Test give and take controls
     # self.task_monitor_controls()
-    self.task_launch_drone(self.takeoff_height)
+    self.task_launch_drone(self.cfg.takeoff_height)
     self.task_goto_wps()
     #Perform rtl
     self.drone.rtl()
@@ -50,8 +50,9 @@ def _main():
 
   while socket:
     try:
-      topic, msg = socket.recv()
-      _logger.info('%s: %s', topic, str(msg)[:256])
+      # Only the head of the message is logged, skip the json decoding
+      topic, msg = socket.recv_raw()
+      _logger.info('%s: %s', topic, msg[:256].decode(errors='replace'))
     except zmq.error.Again:
       pass
     except KeyboardInterrupt:
@@ -34,7 +34,7 @@ def _main():
   dss.auxiliaries.logging.configure('manage_crm.log', stdout=args.stdout, rotating=True, loglevel=args.log, subdir=subnet)
 
   # Create connection string for crm. TODO Open pandora's box and change command line string instead
-  crm_connection_string = args.ip + ":" + int(args.port)
+  crm_connection_string = f'{args.ip}:{args.port}'
   crm = dss.client.CRM(zmq.Context(), crm_connection_string, app_name='manage_crm.py', app_id='root')
 
   if args.delStaleClients:
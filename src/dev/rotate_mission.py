@@ -2,6 +2,8 @@ import argparse
 import json
 import math
 
+import numpy as np
+
 parser = argparse.ArgumentParser()
 parser.add_argument('--rotatedeg', default=0)
 parser.add_argument('--file', default='MissionXY.json')
@@ -14,38 +16,31 @@ with open(mission_file,'r', encoding='utf-8') as infile:
   mission = json.load(infile)
   print(mission)
 
+# Rotate all waypoints at once
+wps = list(mission.keys())
+xy = np.array([[mission[wp]["x"], mission[wp]["y"]] for wp in wps], dtype=np.float64).reshape(-1, 2)
+rot = np.array([[math.cos(rot_rad), -math.sin(rot_rad)],
+                [math.sin(rot_rad),  math.cos(rot_rad)]])
+north_east = (xy @ rot.T).round(1).tolist()
+
+# Rotate headings, -1 means no heading
+headings = np.array([mission[wp]["heading"] for wp in wps])
+rot_headings = headings + rot_deg
+rot_headings = np.where(rot_headings < 0, rot_headings + 360, rot_headings)
+rot_headings = np.where(360 < rot_headings, rot_headings - 360, rot_headings)
+rot_headings = np.where(headings != -1, rot_headings, headings).tolist()
+
 rot_mission = {}
-for wp in mission:
-  print(wp)
-  print(mission[wp]["x"])
-  rot_mission.update({wp:{}})
-  x = mission[wp]["x"]
-  y = mission[wp]["y"]
-  down = mission[wp]["z"]
-  heading = mission[wp]["heading"]
-
-  if heading != -1:
-    heading += rot_deg
-    if  heading < 0:
-      heading += 360
-    if 360 < heading:
-      heading -=360
-
-  try:
-    speed = mission[wp]["speed"]
-  except:
-    speed = False
-  north = round(x * math.cos(rot_rad) - y * math.sin(rot_rad),1)
-  east = round(x * math.sin(rot_rad) + y * math.cos(rot_rad),1)
-
-  rot_mission[wp].update({"north": north})
-  rot_mission[wp].update({"east": east})
-  rot_mission[wp].update({"down": down})
-  rot_mission[wp].update({"heading": heading})
+for i, wp in enumerate(wps):
+  rot_mission[wp] = {"north": north_east[i][0],
+                     "east": north_east[i][1],
+                     "down": mission[wp]["z"],
+                     "heading": rot_headings[i]}
+  speed = mission[wp].get("speed")
   if speed:
-    rot_mission[wp].update({"speed": speed})
+    rot_mission[wp]["speed"] = speed
 
 print(rot_mission)
 
 with open('Mission.json','w',encoding='utf-8') as outfile:
-  outfile.write(json.dumps(rot_mission, indent=4))
+  json.dump(rot_mission, outfile, indent=4)
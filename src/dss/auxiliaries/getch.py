@@ -10,38 +10,44 @@ __version__ = '1.1.0'
 __copyright__ = 'Copyright (c) 2021, RISE'
 __status__ = 'development'
 
+import sys
+
+try:
+  import msvcrt
+except ImportError:
+  msvcrt = None
+  import termios
+  import tty
+
 class _Getch:
   '''Gets a single character from standard input. Does not echo to the screen.'''
   def __init__(self):
-    try:
+    if msvcrt:
       self._impl = _GetchWindows()
-    except ImportError:
+    else:
       self._impl = _GetchUnix()
 
   def __call__(self):
     return self._impl()
 
 class _GetchUnix:
+  def __init__(self):
+    # stdin is looked up on first use, it might not be a terminal on import
+    self._fd = None
+
   def __call__(self):
-    import sys
-    import termios
-    import tty
-    fd = sys.stdin.fileno()
-    old_settings = termios.tcgetattr(fd)
+    if self._fd is None:
+      self._fd = sys.stdin.fileno()
+    old_settings = termios.tcgetattr(self._fd)
     try:
-      tty.setraw(sys.stdin.fileno())
+      tty.setraw(self._fd)
       ch = sys.stdin.read(1)
     finally:
-      termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+      termios.tcsetattr(self._fd, termios.TCSADRAIN, old_settings)
     return ch
 
 class _GetchWindows:
-  def __init__(self):
-    '''This should fail if msvcrt isn't available -> not on Windows'''
-    import msvcrt #pylint: disable=import-outside-toplevel,unused-import
-
   def __call__(self):
-    import msvcrt #pylint: disable=import-outside-toplevel
     return msvcrt.getch().decode()
 
 getch = _Getch()
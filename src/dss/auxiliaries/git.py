@@ -1,7 +1,8 @@
 '''git auxiliaries'''
 
+import functools
 import logging
-import traceback
+import os
 
 #--------------------------------------------------------------------#
 
@@ -13,31 +14,76 @@ __status__ = 'development'
 #--------------------------------------------------------------------#
 
 _logger = logging.getLogger(__name__)
+_repo = None
+
+# Returned when the git information is not available or skipped
+_UNKNOWN = '??'
 
 #--------------------------------------------------------------------#
 
+def _skip() -> bool:
+  '''Set DSS_SKIP_GIT=1 to avoid importing GitPython and scanning for the repository'''
+  return os.environ.get('DSS_SKIP_GIT') == '1'
+
+def _get_repo():
+  '''Returns the repository, it is only looked up once'''
+  global _repo
+  if _repo is None:
+    import git
+    _repo = git.Repo(search_parent_directories=True)
+  return _repo
+
+def _log_error(error: Exception) -> None:
+  '''A missing repository or GitPython is expected on deployed systems'''
+  if isinstance(error, ImportError):
+    _logger.warning('GitPython is not installed')
+    return
+  import git
+  if isinstance(error, (git.InvalidGitRepositoryError, git.NoSuchPathError)):
+    _logger.warning(f'Not a git repository: {error}')
+  else:
+    # The traceback is only formatted when debugging
+    _logger.error('git: %s', error, exc_info=_logger.isEnabledFor(logging.DEBUG))
+
+@functools.lru_cache(maxsize=1)
 def branch() -> str:
+  if _skip():
+    return _UNKNOWN
   try:
-    import git
-    repo = git.Repo(search_parent_directories=True)
-    return repo.active_branch.name
-  except:
-    _logger.error(traceback.format_exc())
-    return '??'
+    return _get_repo().active_branch.name
+  except Exception as error:
+    _log_error(error)
+    return _UNKNOWN
 
+@functools.lru_cache(maxsize=1)
 def describe() -> str:
+  if _skip():
+    return _UNKNOWN
   try:
-    import git
-    repo = git.Repo(search_parent_directories=True)
-    return repo.git.describe()
-  except:
-    _logger.error(traceback.format_exc())
-    return '??'
+    return _get_repo().git.describe()
+  except Exception as error:
+    _log_error(error)
+    return _UNKNOWN
+
+@functools.lru_cache(maxsize=1)
+def short_hash() -> str:
+  '''Abbreviated hash of HEAD, read without spawning a git process'''
+  if _skip():
+    return _UNKNOWN
+  try:
+    return _get_repo().head.commit.hexsha[:12]
+  except Exception as error:
+    _log_error(error)
+    return _UNKNOWN
 
 def pull() -> None:
+  if _skip():
+    return
   try:
-    import git
-    repo = git.Repo(search_parent_directories=True)
-    repo.remotes.origin.pull()
-  except:
-    _logger.error(traceback.format_exc())
+    _get_repo().remotes.origin.pull()
+  except Exception as error:
+    _log_error(error)
+  finally:
+    branch.cache_clear()
+    describe.cache_clear()
+    short_hash.cache_clear()
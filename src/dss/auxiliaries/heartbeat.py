@@ -10,6 +10,7 @@ And this is how to check whether the connection to the heartbeat server still ex
     pass
 '''
 
+import functools
 import logging
 import socket
 import threading
@@ -22,6 +23,7 @@ __version__ = '1.1.0'
 __copyright__ = 'Copyright (c) 2019-2021, RISE'
 __status__ = 'development'
 
+@functools.lru_cache(maxsize=1)
 def _get_ip_address():
   soc = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
   try:
@@ -34,6 +36,10 @@ def _get_ip_address():
     soc.close()
   return address
 
+def refresh_ip_address():
+  '''Forget the cached server address, e.g. after the network changed'''
+  _get_ip_address.cache_clear()
+
 class _Instance:
   '''template for both the server and client implementation'''
 
@@ -80,24 +86,34 @@ class Server(_Instance):
 
     self._interval = interval
     self._socket_str = address
-    self._context = zmq.Context() if context is None else context
+    self._context = zmq.Context.instance() if context is None else context
     self._socket = self._context.socket(zmq.PUB)
+    self._payload = b''
 
   def _start(self):
     '''Start the heartbeat server'''
     self._socket.bind(self._socket_str)
+    # The message never changes, encode it once
+    self._payload = f'heartbeat {self._interval}'.encode('ascii')
     self._logger.info('Starting heartbeat server on %s... done', self._socket_str)
     self._logger.info('Server address: %s', _get_ip_address())
     return True
 
   def _main(self):
     '''Internal main method of the heartbeat server'''
-    topic = 'heartbeat'
+    # Sleep until the next deadline so the send time does not add up
+    next_tick = time.monotonic()
     while self.alive:
-      message = f'{topic} {self._interval}'
-      self._logger.debug(message)
-      self._socket.send_string(message)
-      time.sleep(self._interval)
+      self._logger.debug('%s', self._payload)
+      self._socket.send(self._payload, zmq.NOBLOCK)
+      next_tick += self._interval
+      delay = next_tick - time.monotonic()
+      if delay > 0:
+        time.sleep(delay)
+      else:
+        # behind schedule after a stall, skip the missed beats instead
+        # of sending them back-to-back
+        next_tick = time.monotonic()
 
 class Client(_Instance):
   '''heartbeat client'''
@@ -108,8 +124,11 @@ class Client(_Instance):
 
     self._attempts = attempts
     self._socket_str = address
-    self._context = zmq.Context() if context is None else context
+    self._context = zmq.Context.instance() if context is None else context
     self._socket = self._context.socket(zmq.SUB)
+    self._poller = zmq.Poller()
+    self._poller.register(self._socket, zmq.POLLIN)
+    self._timeout = 1000 # in milliseconds
     self._vital = False
 
   @property
@@ -124,11 +143,12 @@ class Client(_Instance):
 
   def _start(self):
     '''Start the heartbeat client'''
+    # Only the latest beat matters, must be set before connect
+    self._socket.setsockopt(zmq.CONFLATE, 1)
     self._socket.connect(self._socket_str)
     self._logger.info('Starting heartbeat client on %s... done', self._socket_str)
 
     self._socket.setsockopt_string(zmq.SUBSCRIBE, 'heartbeat')
-    self._socket.RCVTIMEO = 1000 # in milliseconds
 
     return True
 
@@ -136,9 +156,7 @@ class Client(_Instance):
     '''Internal main method of the heartbeat client'''
     attempts = self._attempts
     while self.alive:
-      try:
-        message = str(self._socket.recv(), 'utf-8')
-      except zmq.error.Again:
+      if not self._poller.poll(self._timeout):
         if self._vital:
           if attempts > 0:
             attempts = attempts-1
@@ -146,13 +164,14 @@ class Client(_Instance):
               self._logger.warning('Failed to receive heartbeat (attempt #%d)', self._attempts-attempts)
           else:
             self._logger.error('Lost connection to the heartbeat server')
-            self._socket.RCVTIMEO = 1000 # in milliseconds
+            self._timeout = 1000 # in milliseconds
             self._vital = False
       else:
+        message = str(self._socket.recv(), 'utf-8')
         if not self._vital:
           self._vital = True
           self._logger.info('Connecting to heartbeat server... done')
           self._interval = float(message.split()[-1])
           self._logger.info('interval: %g', self._interval)
-          self._socket.RCVTIMEO = int(self._interval*1000) # in milliseconds
+          self._timeout = int(self._interval*1000) # in milliseconds
         attempts = self._attempts
@@ -1,6 +1,5 @@
 '''logging auxiliaries'''
 
-import datetime
 import logging
 import os
 import sys
@@ -53,7 +52,10 @@ def configure(filename: str = '', stdout: bool = True, rotating = False, logleve
       handler.doRollover()
     logging.getLogger().addHandler(handler)
   else:
-    logging.basicConfig(filename=os.path.join(dir, datetime.datetime.now().strftime('%Y%m%d-%H%M%S') + '-' + filename), level=logging.INFO, format=format)
+    handler = logging.FileHandler(filename=os.path.join(dir, filename), mode='a')
+    handler.setFormatter(formatter)
+    logging.getLogger().addHandler(handler)
+    logging.getLogger().setLevel(logging.INFO)
 
   if stdout:
     handler = logging.StreamHandler()
@@ -67,5 +69,5 @@ def configure(filename: str = '', stdout: bool = True, rotating = False, logleve
   logging.getLogger('dss').setLevel(numeric_level)
 
   # always log version and command line arguments
-  _logger.info(f'{sys.argv[0]} {dss.__version__} {dss.auxiliaries.git.describe()}')
+  _logger.info(f'{sys.argv[0]} {dss.__version__} {dss.auxiliaries.git.short_hash()}')
   _logger.info(f'arguments: {sys.argv[1:]}')
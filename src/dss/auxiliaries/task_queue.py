@@ -15,8 +15,8 @@ Example:
   queue.stop()
 '''
 
+import collections
 import threading
-import time
 
 __author__ = 'Lennart Ochel <lennart.ochel@ri.se>, Andreas Gising <andreas.gising@ri.se>, Kristoffer Bergman <kristoffer.bergman@ri.se>, Hanna Müller <hanna.muller@ri.se>, Joel Nordahl'
 __version__ = '1.2.0'
@@ -30,7 +30,8 @@ class TaskQueue:
     self._event = threading.Event()
     self._exception_handler = exception_handler
     self._mutex = threading.Lock()
-    self._tasks = list()
+    self._idle = threading.Condition(self._mutex)
+    self._tasks = collections.deque()
     self._thread = None
 
   def start(self):
@@ -54,21 +55,27 @@ class TaskQueue:
 
   def clear(self):
     '''Remove all queued tasks.'''
-    with self._mutex:
-      self._tasks.clear()
+    self._tasks.clear()
 
   def join(self):
     '''Wait until the task queue finished all tasks.'''
-    self._event.set()
-    while self._event.is_set():
-      time.sleep(0.1)
+    with self._idle:
+      self._event.set()
+      self._idle.wait_for(lambda: not self._event.is_set())
 
-  def add(self, task, arg1=None, arg2=None, arg3=None, arg4=None):
+  def add(self, task, *args, **kwargs):
     '''Insert a task into the queue.'''
-    with self._mutex:
-      self._tasks.append((task, arg1, arg2, arg3, arg4))
+    # deque.append and popleft are atomic, the queue itself needs no lock
+    self._tasks.append((task, args, kwargs))
     self._event.set()
 
+  def wait_idle(self, timeout=None) -> bool:
+    '''Waits until the queue is empty and the last task finished, or
+    until timeout seconds passed. Returns True if idling. Unlike join(),
+    it does not wake the worker up.'''
+    with self._idle:
+      return self._idle.wait_for(lambda: not self._event.is_set(), timeout)
+
   @property
   def idling(self):
     '''Returns true if there are no tasks in the queue.'''
@@ -83,28 +90,27 @@ class TaskQueue:
     while self.alive:
       self._event.wait()
 
-      with self._mutex:
-        if self._tasks:
-          (task, arg1, arg2, arg3, arg4) = self._tasks.pop(0)
-        else:
-          (task, arg1, arg2, arg3, arg4) = (None, None, None, None, None)
+      try:
+        (task, args, kwargs) = self._tasks.popleft()
+      except IndexError:
+        # the mutex only guards the idle notification of join()
+        with self._mutex:
           self._event.clear()
-
-      if task:
-        try:
-          if arg1 is None:
-            task()
-          elif arg2 is None:
-            task(arg1)
-          elif arg3 is None:
-            task(arg1, arg2)
-          elif arg4 is None:
-            task(arg1, arg2, arg3)
-          else:
-            task(arg1, arg2, arg3, arg4)
-        except Exception as error:
-          if self._exception_handler:
-            self._exception_handler(error)
+          # a task added before the event was cleared must not be missed
+          if self._tasks:
+            self._event.set()
           else:
-            raise
-    self._event.clear()
+            self._idle.notify_all()
+        continue
+
+      try:
+        task(*args, **kwargs)
+      except Exception as error:
+        if self._exception_handler:
+          self._exception_handler(error)
+        else:
+          raise
+
+    with self._mutex:
+      self._event.clear()
+      self._idle.notify_all()
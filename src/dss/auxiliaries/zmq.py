@@ -1,16 +1,32 @@
 '''zmq auxiliaries'''
 
 import base64
+import functools
+import heapq
 import ipaddress
+import itertools
 import json
 import logging
+import mmap
+import queue
 import socket
 import threading
+import time
 import traceback
 import typing
 
 import zmq
 
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+try:
+  import msgpack
+except ImportError:
+  msgpack = None
+
 import dss.auxiliaries.exception
 import dss.auxiliaries.config
 
@@ -27,19 +43,65 @@ _logger = logging.getLogger(__name__)
 
 #--------------------------------------------------------------------#
 
+# orjson is used for the message encoding if it is installed
+if orjson:
+  def _dumps(msg) -> bytes:
+    return orjson.dumps(msg, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+  _loads = orjson.loads
+else:
+  def _dumps(msg) -> bytes:
+    return json.dumps(msg).encode('utf-8')
+  _loads = json.loads
+
+def _recv_buffer(socket, flags: int = 0):
+  '''Receives a frame without copying it into a new bytes object when
+  the decoder (orjson) can read the frame buffer directly'''
+  frame = socket.recv(flags, copy=False)
+  return frame.buffer if orjson else frame.bytes
+
+#--------------------------------------------------------------------#
+
 def Context() -> zmq.Context:
   return zmq.Context()
 
+def _parse_network(prefix: str) -> typing.Optional[typing.Tuple[int, int]]:
+  '''(net_int, mask_int) of a subnet prefix. Accepts CIDR ('10.44.1.0/24'),
+  partial dotted prefixes ('10.44.1') and network addresses where
+  trailing zero octets are host bits ('192.168.1.0')'''
+  try:
+    if '/' not in prefix:
+      octets = [octet for octet in prefix.strip('.').split('.') if octet]
+      while len(octets) > 1 and octets[-1] == '0':
+        octets.pop()
+      prefix = '.'.join(octets + ['0'] * (4 - len(octets))) + f'/{8 * len(octets)}'
+    network = ipaddress.ip_network(prefix, strict=False)
+  except ValueError:
+    _logger.warning(f'invalid subnet ip in config: {prefix}')
+    return None
+  return (int(network.network_address), int(network.netmask))
+
+@functools.lru_cache(maxsize=1)
+def _subnet_table() -> typing.Tuple[typing.Tuple[str, typing.Optional[typing.Tuple[int, int]], int, int], ...]:
+  '''(name, (net_int, mask_int), port_min, port_max) of each configured subnet'''
+  subnets = dss.auxiliaries.config.config['zeroMQ']['subnets']
+  return tuple((name, _parse_network(subnet['ip']) if subnet.get('ip') else None, subnet.get('port_min'), subnet.get('port_max')) for name, subnet in subnets.items())
+
+@functools.lru_cache(maxsize=64)
 def get_subnet(ip: typing.Optional[str] = None, port: typing.Optional[int] = None) -> str:
   if ip:
-    for subnet in dss.auxiliaries.config.config['zeroMQ']['subnets']:
-      if dss.auxiliaries.config.config['zeroMQ']['subnets'][subnet]['ip'] in ip:
-        return subnet
+    try:
+      ip_int = int(ipaddress.ip_address(ip))
+    except ValueError:
+      ip_int = None
+    if ip_int is not None:
+      for name, network, _, _ in _subnet_table():
+        if network is not None and ip_int & network[1] == network[0]:
+          return name
 
   if port:
-    for subnet in dss.auxiliaries.config.config['zeroMQ']['subnets']:
-      if dss.auxiliaries.config.config['zeroMQ']['subnets'][subnet]['port_min'] <= port <= dss.auxiliaries.config.config['zeroMQ']['subnets'][subnet]['port_max']:
-        return subnet
+    for name, _, port_min, port_max in _subnet_table():
+      if port_min is not None and port_min <= port <= port_max:
+        return name
 
   return ''
 
@@ -57,9 +119,11 @@ def get_ip_address() -> str:
     soc.close()
   return address
 
+@functools.lru_cache(maxsize=1)
 def get_ip() -> str:
   '''Returns the ip of the vpn subnet. If that is not possible, it
-  uses get_ip_address as fallback strategy.'''
+  uses get_ip_address as fallback strategy. The result is cached, see
+  refresh_ip().'''
   from netifaces import AF_INET, ifaddresses, interfaces
 
   # If dronenet VPN is used, find the VPN ip of host machine
@@ -70,9 +134,19 @@ def get_ip() -> str:
 
   return get_ip_address()
 
+def refresh_ip() -> None:
+  '''Forget the cached get_ip() result, e.g. after the network changed'''
+  get_ip.cache_clear()
+
 def valid_ip(ip: str, localhost: bool = False, asterisk: bool = False) -> bool:
+  # unhashable input cannot be looked up in the cache
+  if not isinstance(ip, str):
+    return False
+  return _valid_ip(ip, localhost, asterisk)
+
+@functools.lru_cache(maxsize=1024)
+def _valid_ip(ip: str, localhost: bool, asterisk: bool) -> bool:
   try:
-    assert isinstance(ip, str)
     ipaddress.ip_address(ip)
   except:
     if localhost and ip == 'localhost':
@@ -93,23 +167,38 @@ def ack(call: str, args: typing.Optional[dict] = None) -> dict:
   else:
     return msg
 
+@functools.lru_cache(maxsize=256)
+def ack_bytes(call: str) -> bytes:
+  '''json encoded ack(call), for replies without arguments'''
+  return _dumps(ack(call))
+
+@functools.lru_cache(maxsize=256)
+def request_bytes(fcn: str, id: str) -> bytes:
+  '''json encoded {'fcn': fcn, 'id': id}, for requests without arguments'''
+  return _dumps({'fcn': fcn, 'id': id})
+
 def nack(call: str, desc: str) -> dict:
   return {'fcn': 'nack', 'call': call, 'description': desc}
 
-def send_and_receive(socket, msg: dict) -> dict:
-  json_msg = json.dumps(msg)
+def unwrap_json(msg):
+  '''Decodes a message that older peers sent json encoded twice'''
+  if isinstance(msg, str):
+    _logger.debug('received a message that is json encoded twice, the peer should be updated')
+    return _loads(msg)
+  return msg
 
+def send_and_receive(socket, msg: dict) -> dict:
   try:
-    socket.send_json(json_msg)
+    socket.send(_dumps(msg))
   except zmq.error.ZMQError as error:
     raise dss.auxiliaries.exception.NoAnswer(msg, socket.ip, socket.port)
 
   try:
-    json_reply = socket.recv_json()
+    json_reply = _loads(_recv_buffer(socket))
   except zmq.error.Again as error:
     raise dss.auxiliaries.exception.NoAnswer(msg, socket.ip, socket.port)
 
-  return json.loads(json_reply)
+  return unwrap_json(json_reply)
 
 def is_ack(answer: dict, call: typing.Optional[str] = None) -> bool:
   if answer.get('fcn') == 'ack':
@@ -137,23 +226,47 @@ def close_socket_gracefully(socket) -> None:
 
 def mogrify(topic: str, msg: dict) -> str:
   '''Combines a topic identifier and a json representation of a dictionary'''
-  return '%s %s' % (topic, json.dumps(msg))
+  return '%s %s' % (topic, _dumps(msg).decode('utf-8'))
 
-def demogrify(msg: str) -> typing.Tuple[str, dict]:
-  '''Inverse of mogrify()'''
+def demogrify(msg: typing.Union[str, bytes]) -> typing.Tuple[str, dict]:
+  '''Inverse of mogrify(), msg may also be the received bytes'''
   try:
     topic, message = msg.split(maxsplit=1)
   except ValueError:
     topic, message = (msg, '{}')
 
   try:
-    message = json.loads(message)
+    message = _loads(message)
   except:
     message = {}
     _logger.error(traceback.format_exc())
 
+  if isinstance(topic, bytes):
+    topic = topic.decode('utf-8')
   return topic, message
 
+def mogrify_bin(topic: str, msg: dict) -> bytes:
+  '''Combines a topic identifier and a msgpack representation of a dictionary'''
+  return topic.encode('utf-8') + b' ' + msgpack.packb(msg, use_bin_type=True)
+
+def demogrify_bin(data: bytes) -> typing.Tuple[str, dict]:
+  '''Inverse of mogrify_bin()'''
+  topic, _, message = data.partition(b' ')
+
+  try:
+    message = msgpack.unpackb(message, raw=False) if message else {}
+  except:
+    message = {}
+    _logger.error(traceback.format_exc())
+
+  return topic.decode('utf-8'), message
+
+def _check_wire(wire: str) -> None:
+  if wire not in ('json', 'msgpack'):
+    raise dss.auxiliaries.exception.InputError(wire, 'wire must be json or msgpack')
+  if wire == 'msgpack' and msgpack is None:
+    raise dss.auxiliaries.exception.InputError(wire, 'msgpack is not installed')
+
 def image_to_bytes(filename: str) -> bytes:
   '''t.ex. filename="test.jpg"'''
   with open(filename, "rb") as fh:
@@ -179,17 +292,9 @@ def save_json(filename: str, data: dict) -> None:
 class _Socket:
   def __init__(self, context, ip, port, label, timeout, socket_type=None, self_id=None) -> None:
 
-    tags = list()
-    if self_id:
-      tags.append(f'[{self_id}]')
-    if socket_type:
-      tags.append(f'[{socket_type}]')
-    if label:
-      tags.append(f'[{label}]')
-
     self._context = context
     self._ip = ip
-    self._label = ' '.join(tags)
+    self._set_label(' '.join(f'[{tag}]' for tag in (self_id, socket_type, label) if tag))
     self._port = port
     self._socket = None
     self._timeout = timeout  #in milliseconds
@@ -207,6 +312,10 @@ class _Socket:
     '''Returns the port number'''
     return self._port
 
+  def poll(self, timeout: typing.Optional[int] = None) -> bool:
+    '''Returns True if a message can be received within timeout milliseconds'''
+    return bool(self._socket.poll(timeout, zmq.POLLIN))
+
   def close(self) -> None:
     '''graceful termination'''
     if self._socket:
@@ -216,103 +325,303 @@ class _Socket:
       self._socket = None
 
   # Set label, the label is not always known when init socket, app_id can be missing
+  def _set_label(self, label: str) -> None:
+    # log formats are built once, the label must not be taken for a format spec
+    self._label = label
+    escaped = label.replace('%', '%%')
+    self._send_log_fmt = escaped + ' send: %.256s'
+    self._recv_log_fmt = escaped + ' recv: %.256s'
+
   def add_id_to_label(self, label):
-    self._label = '[' + label + '] ' + self._label
+    self._set_label('[' + label + '] ' + self._label)
 #--------------------------------------------------------------------#
 
+class _HeartbeatScheduler:
+  '''Sends the heartbeats of all Req sockets from a single thread.
+
+  A Req gets a heartbeat if it has not communicated for its timeout.
+  The heartbeats are sent without blocking and the replies are
+  collected with one poller, so an unresponsive peer does not delay
+  the heartbeats to the others.'''
+  def __init__(self) -> None:
+    self._cv = threading.Condition()
+    self._heap = [] # (due, seq, req)
+    self._reqs = set()
+    self._seq = itertools.count()
+    self._thread = None
+
+  def add(self, req) -> None:
+    with self._cv:
+      if req in self._reqs:
+        return
+      self._reqs.add(req)
+      req._last_activity = time.monotonic()
+      self._push(req._last_activity + req._timeout/1000.0, req)
+      if self._thread is None:
+        self._thread = threading.Thread(target=self._main, daemon=True)
+        self._thread.start()
+      self._cv.notify()
+
+  def remove(self, req) -> None:
+    with self._cv:
+      self._reqs.discard(req)
+
+  def _push(self, due: float, req) -> None:
+    heapq.heappush(self._heap, (due, next(self._seq), req))
+
+  def _send_due(self, now: float, poller, pending: dict) -> None:
+    '''Sends the heartbeats that are due, called with self._cv held'''
+    while self._heap and self._heap[0][0] <= now:
+      _, _, req = heapq.heappop(self._heap)
+      if req not in self._reqs:
+        continue
+      period = req._timeout/1000.0
+      due = req._last_activity + period
+      if due > now:
+        # other messages were exchanged in the meantime
+        self._push(due, req)
+        continue
+      if not req._mutex.acquire(blocking=False):
+        # a request is in progress
+        self._push(now + period, req)
+        continue
+
+      sock = req._socket
+      try:
+        sock.send(req._next_heartbeat(), zmq.NOBLOCK)
+      except Exception as error:
+        req._mutex.release()
+        if not isinstance(error, zmq.error.ZMQError):
+          _logger.error(f'{req._label} heartbeat failed\n{traceback.format_exc()}')
+        req._heartbeat_answer(None)
+        self._push(now + period, req)
+      else:
+        poller.register(sock, zmq.POLLIN)
+        pending[sock] = (req, now + period)
+
+  def _finish(self, req, answer: typing.Optional[dict], now: float) -> None:
+    '''Handles the reply to a heartbeat, or its absence'''
+    try:
+      if answer is None:
+        # a req socket without reply cannot be used again
+        req.reconnect()
+      else:
+        req._last_activity = now
+      req._heartbeat_answer(answer)
+    except Exception:
+      _logger.error(f'{req._label} heartbeat failed\n{traceback.format_exc()}')
+    finally:
+      req._mutex.release()
+
+    with self._cv:
+      if req in self._reqs:
+        self._push(now + req._timeout/1000.0, req)
+
+  def _main(self) -> None:
+    poller = zmq.Poller()
+    pending = {} # socket -> (req, deadline)
+    try:
+      while True:
+        with self._cv:
+          now = time.monotonic()
+          self._send_due(now, poller, pending)
+          next_due = self._heap[0][0] if self._heap else None
+          if not pending:
+            self._cv.wait(None if next_due is None else next_due - now)
+            continue
+
+        # wait for the replies, at most until the next heartbeat is due
+        deadline = min(deadline for _, deadline in pending.values())
+        if next_due is not None:
+          deadline = min(deadline, next_due)
+        try:
+          ready = dict(poller.poll(max(0.0, deadline - time.monotonic())*1000))
+          failed = False
+        except zmq.error.ContextTerminated:
+          raise
+        except zmq.error.ZMQError:
+          _logger.error(f'heartbeat poll failed\n{traceback.format_exc()}')
+          ready = {}
+          failed = True # give up on all heartbeats in flight
+
+        now = time.monotonic()
+        for sock, (req, deadline) in list(pending.items()):
+          if sock in ready:
+            try:
+              answer = unwrap_json(_loads(_recv_buffer(sock)))
+            except Exception:
+              answer = {} # not an ack, but the socket is still in sync
+          elif failed or deadline <= now:
+            answer = None
+          else:
+            continue
+
+          poller.unregister(sock)
+          del pending[sock]
+          self._finish(req, answer, now)
+    except zmq.error.ContextTerminated:
+      _logger.info('heartbeat scheduler stopped, the context was terminated')
+    except Exception:
+      _logger.error(f'heartbeat scheduler stopped\n{traceback.format_exc()}')
+    finally:
+      # the next add() starts a new thread
+      for req, _ in pending.values():
+        self._finish(req, None, time.monotonic())
+      with self._cv:
+        self._thread = None
+
+_heartbeat_scheduler = _HeartbeatScheduler()
+
 class Req(_Socket):
-  def __init__(self, context, ip, port, label=None, timeout=1000, self_id=None) -> None:
+  '''Request socket. With pool_size > 1, concurrent send_and_receive()
+  calls use up to pool_size - 1 additional sockets instead of waiting
+  for the main socket.'''
+  def __init__(self, context, ip, port, label=None, timeout=1000, self_id=None, pool_size=1) -> None:
     _Socket.__init__(self, context, ip, port, label, timeout, socket_type='req', self_id=self_id)
 
-    self._alive = False
-    self._event = threading.Event()
+    self._heartbeat_attempts = 0
     self._heartbeat_msg = None
+    self._heartbeat_prefix = None
+    self._heartbeat_tick = 0
+    self._last_activity = time.monotonic()
     self._mutex = threading.Lock()
-    self._thread = None
+    self._closed = False
+    self._pool = queue.LifoQueue() # idle additional sockets
+    self._pool_lock = threading.Lock() # guards _closed and returning sockets to the pool
+    self._pool_size = max(1, pool_size)
+    self._pool_slots = threading.BoundedSemaphore(self._pool_size - 1)
 
     self.connect()
 
   def close(self) -> None:
-    if self._thread:
-      # stop heartbeat thread
-      self._alive = False
-      self._event.set()
-      self._thread.join()
-      self._thread = None
+    _heartbeat_scheduler.remove(self)
 
-    _Socket.close(self)
+    # requests in flight on pooled sockets close them when done
+    with self._pool_lock:
+      self._closed = True
+      while not self._pool.empty():
+        close_socket_gracefully(self._pool.get_nowait())
+
+    # wait for a heartbeat in progress
+    with self._mutex:
+      _Socket.close(self)
+
+  def _new_socket(self):
+    sock = self._context.socket(zmq.REQ)
+    # native timeouts, send/recv raise zmq.error.Again without polling
+    sock.RCVTIMEO = self._timeout
+    sock.SNDTIMEO = self._timeout
+    sock.LINGER = 0
+    sock.connect(f'tcp://{self._ip}:{self._port}')
+    return sock
 
   def connect(self) -> None:
     #assert valid_ip(self._ip, localhost=True), f'bad ip address: {self._ip}'
 
-    self._socket = self._context.socket(zmq.REQ)
-    self._socket.connect(f'tcp://{self._ip}:{self._port}')
-    self._socket.RCVTIMEO = self._timeout
+    self._socket = self._new_socket()
     _logger.debug(f'{self._label} Connected to tcp://{self._ip}:{self._port} with timeout {self._timeout}')
 
   def start_heartbeat(self, client_id=None) -> None:
     # update heartbeat message
     if client_id:
       self._heartbeat_msg = {'fcn': 'heart_beat', 'id': client_id}
+      # serialized once, only the tick is appended per heartbeat
+      self._heartbeat_prefix = _dumps(self._heartbeat_msg)[:-1] + b',"tick":'
 
-    # thread is already running
-    if self._thread:
-      return
-
-    # start heartbeat thread
     if self._heartbeat_msg:
-      self._thread = threading.Thread(target=self._main_heartbeat, daemon=True)
-      self._thread.start()
+      _heartbeat_scheduler.add(self)
 
   def reconnect(self):
     _logger.info(f'{self._label} reconnecting...')
     _Socket.close(self)
     self.connect()
 
-  def _send_and_receive(self, msg: dict) -> dict:
-    _logger.debug(f'{self._label} send: %s', str(msg)[:256])
+  def _try_send_and_receive(self, msg: dict, data: typing.Optional[bytes] = None) -> typing.Optional[dict]:
+    '''Returns None instead of raising NoAnswer, for callers that
+    expect timeouts. data is the already serialized msg, if available'''
+    _logger.debug(self._send_log_fmt, msg)
 
     try:
-      json_msg = json.dumps(msg)
-      self._socket.send_json(json_msg)
-    except zmq.error.ZMQError as error:
+      self._socket.send(_dumps(msg) if data is None else data)
+    except zmq.error.ZMQError:
+      return None
+
+    try:
+      answer = unwrap_json(_loads(_recv_buffer(self._socket)))
+    except zmq.error.Again:
+      self.reconnect()
+      return None
+
+    self._last_activity = time.monotonic()
+    _logger.debug(self._recv_log_fmt, answer)
+    return answer
+
+  def _send_and_receive(self, msg: dict, data: typing.Optional[bytes] = None) -> dict:
+    '''data is the already serialized msg, if available'''
+    answer = self._try_send_and_receive(msg, data)
+    if answer is None:
       raise dss.auxiliaries.exception.NoAnswer(msg, self.ip, self.port)
-    else:
+    return answer
+
+  def send_and_receive(self, msg: dict, data: typing.Optional[bytes] = None) -> dict:
+    '''data is the already serialized msg, if available'''
+    # the main socket is used whenever it is free
+    if self._mutex.acquire(blocking=self._pool_size == 1):
       try:
-        json_reply = self._socket.recv_json()
-      except zmq.error.Again as error:
-        self.reconnect()
-        raise dss.auxiliaries.exception.NoAnswer(msg, self.ip, self.port)
-      else:
-        answer = json.loads(json_reply)
-        self._event.set()  # indicates successful communication
+        return self._send_and_receive(msg, data)
+      finally:
+        self._mutex.release()
+    return self._send_and_receive_pooled(msg, data)
 
-    _logger.debug(f'{self._label} recv: %s\n', str(answer)[:256])
-    return answer
+  def _send_and_receive_pooled(self, msg: dict, data: typing.Optional[bytes] = None) -> dict:
+    _logger.debug('%s send (pool): %.256s', self._label, msg)
 
-  def send_and_receive(self, msg: dict) -> dict:
-    with self._mutex:
-      return self._send_and_receive(msg)
+    with self._pool_slots:
+      try:
+        sock = self._pool.get_nowait()
+      except queue.Empty:
+        sock = self._new_socket()
+
+      reusable = False
+      try:
+        sock.send(_dumps(msg) if data is None else data)
+        answer = unwrap_json(_loads(_recv_buffer(sock)))
+        reusable = True
+      except Exception:
+        # no valid reply, e.g. a timeout or an undecodable answer
+        raise dss.auxiliaries.exception.NoAnswer(msg, self.ip, self.port)
+      finally:
+        with self._pool_lock:
+          if reusable and not self._closed:
+            self._pool.put(sock)
+            sock = None
+        if sock is not None:
+          # a req socket without reply cannot be used again
+          close_socket_gracefully(sock)
+
+      self._last_activity = time.monotonic()
+
+    _logger.debug('%s recv (pool): %.256s\n', self._label, answer)
+    return answer
 
   def _send_and_receive_string(self, msg: dict) -> dict:
-    _logger.debug(f'{self._label} send: %s', str(msg)[:256])
+    _logger.debug(self._send_log_fmt, msg)
 
     try:
-      json_msg = json.dumps(msg)
-      self._socket.send_string(json_msg)
+      self._socket.send(_dumps(msg))
     except zmq.error.ZMQError as error:
       raise dss.auxiliaries.exception.NoAnswer(msg, self.ip, self.port)
     else:
       try:
-        json_reply = json.loads(self._socket.recv())
+        json_reply = _loads(_recv_buffer(self._socket))
       except zmq.error.Again as error:
         self.reconnect()
         raise dss.auxiliaries.exception.NoAnswer(msg, self.ip, self.port)
       else:
         answer = json_reply
-        self._event.set()  # indicates successful communication
+        self._last_activity = time.monotonic()
 
-    _logger.debug(f'{self._label} recv: %s\n', str(answer)[:256])
+    _logger.debug(self._recv_log_fmt, answer)
     return answer
 
   def send_and_receive_string(self, msg: dict) -> dict:
@@ -321,27 +630,20 @@ class Req(_Socket):
 
 
 
-  def _main_heartbeat(self):
-    '''Send a heartbeat if no other messages were sent'''
-    attempts = 0
-    self._alive = True
-    tick = 0
-    while self._alive:
-      self._event.clear()
-      self._event.wait(timeout=self._timeout/1000.0)
-      if not self._event.is_set():
-        heartbeat_msg = self._heartbeat_msg
-        heartbeat_msg['tick'] = tick
-        tick += 1
-        answer = self.send_and_receive(heartbeat_msg)
-        if not dss.auxiliaries.zmq.is_ack(answer):
-          attempts += 1
-          if attempts < 3:
-            _logger.warning(f"{self._label} no response to heartbeat ({attempts})")
-          elif attempts == 3:
-            _logger.error(f"{self._label} no response to heartbeat ({attempts})")
-        else:
-          attempts = 0
+  def _next_heartbeat(self) -> bytes:
+    data = b'%s%d}' % (self._heartbeat_prefix, self._heartbeat_tick)
+    self._heartbeat_tick += 1
+    return data
+
+  def _heartbeat_answer(self, answer: typing.Optional[dict]) -> None:
+    if answer is None or not is_ack(answer):
+      self._heartbeat_attempts += 1
+      if self._heartbeat_attempts < 3:
+        _logger.warning(f"{self._label} no response to heartbeat ({self._heartbeat_attempts})")
+      elif self._heartbeat_attempts == 3:
+        _logger.error(f"{self._label} no response to heartbeat ({self._heartbeat_attempts})")
+    else:
+      self._heartbeat_attempts = 0
 
 #--------------------------------------------------------------------#
 
@@ -350,6 +652,7 @@ class Rep(_Socket):
     _Socket.__init__(self, context, ip, port, label, timeout, socket_type='rep', self_id=self_id)
     self.min_port = min_port
     self.max_port = max_port
+    self._wrapped = False # the last request was json encoded twice
     self.connect()
 
   def connect(self) -> None:
@@ -363,14 +666,33 @@ class Rep(_Socket):
     self._socket.RCVTIMEO = self._timeout  #in milliseconds
     _logger.debug(f'{self._label} Connected to tcp://{self._ip}:{self._port} with timeout {self._timeout}')
 
-  def recv_json(self) -> str:
-    request = self._socket.recv_json()
-    _logger.debug(f'{self._label} recv: %s', str(request)[:256])
+  def recv_json(self, flags: int = 0) -> dict:
+    '''Receives a request, also from peers that json encode it twice.
+    Raises zmq.error.Again if flags contains zmq.NOBLOCK and no request
+    is pending.'''
+    request = _loads(_recv_buffer(self._socket, flags))
+    self._wrapped = isinstance(request, str)
+    request = unwrap_json(request)
+    _logger.debug(self._recv_log_fmt, request)
     return request
 
-  def send_json(self, msg: str) -> None:
+  def send_json(self, msg: typing.Union[dict, str, bytes]) -> None:
+    '''Sends a reply, encoded the same way as the last request. msg is
+    either a dict or an already json encoded string or bytes.'''
+    if isinstance(msg, bytes):
+      data = msg
+    elif isinstance(msg, str):
+      data = msg.encode('utf-8')
+    elif len(msg) == 2 and msg.get('fcn') == 'ack' and isinstance(msg.get('call'), str):
+      # plain acks are by far the most common reply
+      data = ack_bytes(msg['call'])
+    else:
+      data = _dumps(msg)
+    if self._wrapped:
+      data = _dumps(data.decode('utf-8'))
+
     try:
-      self._socket.send_json(msg)
+      self._socket.send(data)
     except zmq.error.ZMQError as error:
       # Note to future-me:
       # This is problematic...because the recv-rep protocol would
@@ -378,15 +700,17 @@ class Rep(_Socket):
       _logger.warning(f'{self._label} send: {error}\n')
       raise
     else:
-      _logger.debug(f'{self._label} send: %s\n', str(msg)[:256])
+      _logger.debug(self._send_log_fmt, msg)
 
 #--------------------------------------------------------------------#
 
 class Pub(_Socket):
-  def __init__(self, context, ip='*', port=None, label=None, timeout=1000, min_port=6000, max_port=6100, self_id=None, bind=True) -> None:
+  def __init__(self, context, ip='*', port=None, label=None, timeout=1000, min_port=6000, max_port=6100, self_id=None, bind=True, wire='json') -> None:
     _Socket.__init__(self, context, ip, port, label, timeout, socket_type='pub', self_id=self_id)
+    _check_wire(wire)
     self.min_port = min_port
     self.max_port = max_port
+    self._wire = wire
     self.connect(bind)
 
   def connect(self, bind) -> None:
@@ -405,16 +729,58 @@ class Pub(_Socket):
         raise dss.auxiliaries.exception.Error
     _logger.debug(f'{self._label} Connected to tcp://{self._ip}:{self._port} with timeout {self._timeout}')
 
+  def _header(self, topic: str, msg: dict) -> bytes:
+    if self._wire == 'msgpack':
+      return mogrify_bin(topic, msg)
+    return mogrify(topic, msg).encode('utf-8')
+
   def publish(self, topic: str, msg: dict) -> None:
-    json_msg = mogrify(topic, msg)
-    self._socket.send_string(json_msg)
-    _logger.debug(f'{self._label} %s\n', str(json_msg)[:256])
+    self._socket.send(self._header(topic, msg))
+    _logger.debug('%s %s: %.256s\n', self._label, topic, msg)
+
+  def publish_many(self, items: typing.Iterable[typing.Tuple[str, dict]]) -> None:
+    '''Publishes several (topic, msg) pairs in one go. Each pair is still
+    its own zmq message so that subscribers filter them by topic.'''
+    header = self._header
+    send = self._socket.send
+    for topic, msg in items:
+      send(header(topic, msg))
+    _logger.debug('%s published a batch', self._label)
+
+  def publish_bytes(self, topic: str, msg: dict, payload: bytes) -> None:
+    '''Publishes msg with a binary payload (e.g. an image) in a second
+    frame. Large payloads are handed to zmq without being copied, so
+    they must not be modified afterwards.'''
+    self._socket.send_multipart([self._header(topic, msg), payload], copy=False)
+    _logger.debug('%s %s: %.256s (+%d bytes)\n', self._label, topic, msg, len(payload))
+
+  def publish_file(self, topic: str, msg: dict, filename: str) -> None:
+    '''Like publish_bytes() with the content of filename as payload. The
+    file is memory mapped and read by zmq in place.'''
+    with open(filename, 'rb') as fh:
+      try:
+        data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+      except ValueError:
+        # empty files cannot be mapped
+        data = b''
+
+    tracker = self._socket.send_multipart([self._header(topic, msg), data], copy=False, track=True)
+    # the mapping must stay valid until zmq is done with it
+    tracker.wait()
+    if isinstance(data, mmap.mmap):
+      try:
+        data.close()
+      except BufferError:
+        pass # still referenced by the zmq frame, closed when it is released
+    _logger.debug('%s %s: %.256s (+%s)\n', self._label, topic, msg, filename)
 
 #--------------------------------------------------------------------#
 
 class Sub(_Socket):
-  def __init__(self, context, ip, port, label=None, timeout=1000, self_id=None, subscribe_all=True) -> None:
+  def __init__(self, context, ip, port, label=None, timeout=1000, self_id=None, subscribe_all=True, wire='json') -> None:
     _Socket.__init__(self, context, ip, port, label, timeout, socket_type='sub', self_id=self_id)
+    _check_wire(wire)
+    self._wire = wire
     self.connect(subscribe_all)
 
   def connect(self, subscribe_all) -> None:
@@ -426,16 +792,46 @@ class Sub(_Socket):
     self._socket.connect(f'tcp://{self._ip}:{self._port}')
     _logger.debug(f'{self._label} Connected to tcp://{self._ip}:{self._port} with timeout {self._timeout}')
 
-  def subscribe(self, topic) -> None:
+  def subscribe(self, topic: typing.Union[str, bytes]) -> None:
     _logger.debug(f'{self._label} subscribe topic {topic}')
-    self._socket.setsockopt_string(zmq.SUBSCRIBE, topic)
+    if isinstance(topic, bytes):
+      self._socket.setsockopt(zmq.SUBSCRIBE, topic)
+    else:
+      self._socket.setsockopt_string(zmq.SUBSCRIBE, topic)
 
-  def unsubscribe(self, topic) -> None:
+  def unsubscribe(self, topic: typing.Union[str, bytes]) -> None:
     _logger.debug(f'{self._label} unsubscribe topic {topic}')
-    self._socket.setsockopt_string(zmq.UNSUBSCRIBE, topic)
+    if isinstance(topic, bytes):
+      self._socket.setsockopt(zmq.UNSUBSCRIBE, topic)
+    else:
+      self._socket.setsockopt_string(zmq.UNSUBSCRIBE, topic)
+
+  def _decode(self, data: bytes) -> typing.Tuple[str, dict]:
+    if self._wire == 'msgpack':
+      return demogrify_bin(data)
+    return demogrify(data)
 
   def recv(self) -> typing.Tuple[str, dict]:
-    msg = str(self._socket.recv(), 'utf-8')
-    topic, msg = demogrify(msg)
-    _logger.debug(f'{self._label} {topic}: %s', str(msg)[:256])
+    topic, msg = self._decode(self._socket.recv())
+    if self._socket.getsockopt(zmq.RCVMORE):
+      # drop the payload frames, they are only returned by recv_bytes()
+      self._socket.recv_multipart(copy=False)
+    _logger.debug('%s %s: %.256s', self._label, topic, msg)
     return topic, msg
+
+  def recv_raw(self) -> typing.Tuple[str, bytes]:
+    '''Like recv(), but the message is returned still encoded, for
+    callers that only log or forward it'''
+    topic, _, data = self._socket.recv().partition(b' ')
+    if self._socket.getsockopt(zmq.RCVMORE):
+      self._socket.recv_multipart(copy=False)
+    return topic.decode('utf-8'), data
+
+  def recv_bytes(self) -> typing.Tuple[str, dict, typing.Optional[memoryview]]:
+    '''Receives a message published with Pub.publish_bytes(). The
+    payload is a view of the received frame, or None if there is none.'''
+    frames = self._socket.recv_multipart(copy=False)
+    topic, msg = self._decode(frames[0].bytes)
+    payload = frames[1].buffer if len(frames) > 1 else None
+    _logger.debug('%s %s: %.256s', self._label, topic, msg)
+    return topic, msg, payload
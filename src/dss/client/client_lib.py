@@ -9,8 +9,8 @@ It uses the dss.client.DSS object, which is in charge of the socket
 amd the actual API as described in documentation.
 '''
 
-import json
 import logging
+import threading
 import time
 
 import zmq
@@ -23,6 +23,16 @@ __version__ = '1.1.0'
 __copyright__ = 'Copyright (c) 2019-2021, RISE'
 __status__ = 'development'
 
+# Minimum time between two status log lines, e.g. the altitude
+_STATUS_INTERVAL = 5.0 # seconds
+
+def _backoff(first=0.25, factor=2.0, limit=1.0):
+  '''Poll intervals, growing from first to limit seconds'''
+  delay = first
+  while True:
+    yield delay
+    delay = min(delay * factor, limit)
+
 class Client:
   '''Base class for DSS applications'''
   def __init__(self, timeout, exception_handler=None, context=None):
@@ -36,12 +46,17 @@ class Client:
 
     self._app_id = 'da000'
 
+    self._abort_event = threading.Event()
     self._alive = False
-    self._context = context if context else zmq.Context()
+    # all clients of a process share one context and I/O thread
+    self._context = zmq.Context.instance() if context is None else context
     self._dss = None
     self._exception_handler = exception_handler
+    self._info = None # cached get_info() of the connected dss
+    self._status_time = 0.0
     self._input_handler = None
     self._input_socket = None
+    self._poller = None
     self._task_queue = dss.auxiliaries.TaskQueue(exception_handler=exception_handler)
     self._thread = None
     self._timeout = timeout
@@ -84,8 +99,29 @@ class Client:
 
     self._input_handler = input_handler
     self._input_socket = dss.auxiliaries.zmq.Rep(self._context, '*', port, label='input-rep', timeout=self._timeout)
+    self._poller = zmq.Poller()
+    self._poller.register(self._input_socket._socket, zmq.POLLIN)
     self._logger.info(f"Starting input server on port {port}")
 
+  def _sleep(self, seconds, raise_if_aborted=True):
+    '''Sleeps, but wakes up at once on abort and raises AbortTask'''
+    if raise_if_aborted:
+      # checked first, like the loops did before
+      self.raise_if_aborted()
+      if self._abort_event.wait(seconds):
+        raise dss.auxiliaries.exception.AbortTask()
+    else:
+      # the event stays set after an abort, it cannot be waited on
+      time.sleep(seconds)
+
+  def _status_due(self) -> bool:
+    '''Rate limits the status log lines of the wait loops'''
+    now = time.monotonic()
+    if now - self._status_time < _STATUS_INTERVAL:
+      return False
+    self._status_time = now
+    return True
+
   def raise_if_aborted(self):
     # Test if controls where taken
     if self.in_controls and not self.is_who_controls('APPLICATION'):
@@ -103,6 +139,7 @@ class Client:
 
     self._task_queue.clear()
     self._alive = False
+    self._abort_event.set()
     if rtl:
       self.rtl()
 
@@ -127,6 +164,7 @@ class Client:
     # Connect to DSS
     self._dss = dss.client.DSS(self._context, self._app_id, ip, port, None, timeout=self._timeout)
     self._alive = True
+    self._abort_event.clear()
 
     # Test connection, owner change must have gone through to get ack. Takes some time sometimes
     max_attempt = 20
@@ -147,7 +185,7 @@ class Client:
 
     # DSS class will update dss_id to connected dss when get_info runs.
     try:
-      _ = self._dss.get_info()
+      self._info = self._dss.get_info()
     except dss.auxiliaries.exception.Nack:
       self._logger.warning('Failed to retreive dss_id from get_info. DSS class might not have a dss_id')
 
@@ -166,10 +204,11 @@ class Client:
     # Connect to DSS
     self._dss = dss.client.DSS(self._context, self._app_id, ip, port, None, timeout=self._timeout)
     self._alive = True
+    self._abort_event.clear()
 
     # DSS class will update dss_id to connected dss when get_info runs.
     try:
-      _ = self._dss.get_info()
+      self._info = self._dss.get_info()
     except:
       self._logger.error(f'Error, could not connect as guest to tcp://{ip}:{port}')
 
@@ -185,6 +224,11 @@ class Client:
     self._alive = False
     self._dss._socket.close()
     self._dss = None
+    self.invalidate_info()
+
+  def invalidate_info(self) -> None:
+    '''Forget the cached dss info, it is fetched again on next use'''
+    self._info = None
 
   def run(self):
     '''Executes the mission'''
@@ -193,24 +237,19 @@ class Client:
     # Handle external inputs, e.g. mission abort
     try:
       while self._alive:
-        if self._input_handler:
-          try:
-            msg = self._input_socket.recv_json()
-          except zmq.error.Again:
-            pass
-          else:
-            msg = json.loads(msg)
-            try:
-              self._input_handler(msg)
-            except Exception as error:
-              if self._exception_handler:
-                self._exception_handler(error)
-              answer = json.dumps({'fcn': 'nack', 'call': msg['fcn']})
-            else:
-              answer = json.dumps({'fcn': 'ack', 'call': msg['fcn']})
-            self._input_socket.send_json(answer)
+        if self._poller:
+          # short timeout to notice abort and mission completion quickly
+          if self._poller.poll(100):
+            # drain all pending requests
+            while self._alive:
+              try:
+                msg = self._input_socket.recv_json(zmq.NOBLOCK)
+              except zmq.error.Again:
+                break
+              self._handle_input(msg)
         else:
-          time.sleep(0.5)
+          # returns as soon as the last task finished
+          self._task_queue.wait_idle(0.1)
 
         if self._task_queue.idling:
           self._logger.info('Mission complete')
@@ -226,8 +265,19 @@ class Client:
       self._input_socket.close()
     #self._dss._socket.close()
 
-  def add_task(self, task, arg1=None, arg2=None, arg3=None, arg4=None):
-    self._task_queue.add(task, arg1, arg2, arg3, arg4)
+  def _handle_input(self, msg):
+    try:
+      self._input_handler(msg)
+    except Exception as error:
+      if self._exception_handler:
+        self._exception_handler(error)
+      answer = {'fcn': 'nack', 'call': msg['fcn']}
+    else:
+      answer = {'fcn': 'ack', 'call': msg['fcn']}
+    self._input_socket.send_json(answer)
+
+  def add_task(self, task, *args, **kwargs):
+    self._task_queue.add(task, *args, **kwargs)
 
   # *******************
   # Convenience methods
@@ -249,8 +299,9 @@ class Client:
 
   # Get info pub port or data pub port of connected DSS
   def get_port(self, port_label) -> int:
-    answer = self._dss.get_info()
-    return int(answer[port_label])
+    if self._info is None or port_label not in self._info:
+      self._info = self._dss.get_info()
+    return int(self._info[port_label])
 
   # Check flight mode
   def is_flight_mode(self, mode) -> bool:
@@ -278,11 +329,9 @@ class Client:
   # Await pilot clearance (wait for toggle switch)
   def get_clearance(self, channel):
     while self.is_channel(channel, 'LOW'):
-      self.raise_if_aborted()
-      time.sleep(0.5)
+      self._sleep(0.5)
     while self.is_channel(channel, 'HIGH'):
-      self.raise_if_aborted()
-      time.sleep(0.1)
+      self._sleep(0.1)
 
   # Try to set init point, make sure it is set
   def try_set_init_point(self, heading_ref = 'drone'):
@@ -305,18 +354,17 @@ class Client:
     final_height = height+start_height
     self._dss.arm_take_off(final_height)
     current_height = start_height
+    backoff = _backoff()
     while current_height < final_height * 0.9:
-      time.sleep(1.0)
+      time.sleep(next(backoff))
       self.raise_if_aborted()
       try:
         current_height = self.get_height()
       except dss.auxiliaries.exception.Nack:
         pass
       finally:
-        rel_height = current_height-start_height
-        print('Current height relative takeoff position: %5.1f m' % rel_height, end='\r')
-
-    print('\033[K', end='\r') # clear to the end of line
+        if self._status_due():
+          self._logger.info('Current height relative takeoff position: %5.1f m', current_height-start_height)
 
 
   # Package handling. Special routine to unload package in case of device busy.
@@ -333,15 +381,28 @@ class Client:
     self._dss.set_gripper(False, 1)
     time.sleep(1)
 
+  # Wait until the drone disarmed, logging the altitude
+  def _await_disarmed(self):
+    # bound methods looked up once for the whole wait
+    get_armed = self._dss.get_armed
+    raise_if_aborted = self.raise_if_aborted
+    status_due = self._status_due
+    sleep = time.sleep
+    backoff = _backoff()
+    while get_armed():
+      raise_if_aborted()
+      if status_due():
+        try:
+          self._logger.info('Altitude: %5.1f m', self.get_height())
+        except dss.auxiliaries.exception.Nack:
+          pass
+      sleep(next(backoff))
+
   # Land and disarm, wait for it to complete
   def land_and_disarm_should_be_task(self):
     self.land()
     self._logger.info('wait and disarm')
-    while self.is_armed():
-      self.raise_if_aborted()
-      print('Altitude: %5.1f m' % self.get_height(), end='\r')
-      time.sleep(1.0)
-    print('\033[K', end='\r') # clear to the end of line
+    self._await_disarmed()
     self.await_idling()
 
   # Wait until the controls are handed over
@@ -360,9 +421,7 @@ class Client:
   def await_idling(self, raise_if_aborted = True):
     self._logger.info('Waiting for dss to idle')
     while not self._dss.get_idle():
-      if raise_if_aborted:
-        self.raise_if_aborted()
-      time.sleep(0.5)
+      self._sleep(0.5, raise_if_aborted)
 
   # Track waypoints
   def track_waypoints(self, first_wp=0, raise_if_aborted = True):
@@ -372,14 +431,17 @@ class Client:
     '''
 
     last_answer = first_wp
+    backoff = _backoff()
     while self._dss.get_armed():
-      time.sleep(1.0)
+      time.sleep(next(backoff))
       if raise_if_aborted:
         self.raise_if_aborted()
       currentWP, _ = self._dss.get_currentWP()
       if currentWP != last_answer:
         self._logger.info('reached wp %s', last_answer)
         last_answer = currentWP
+        # the next waypoint may be close, poll fast again
+        backoff = _backoff()
         if last_answer == -1:
           return
 
@@ -412,10 +474,7 @@ class Client:
   def land(self):
     self._dss.land()
     # Wait for rtl to land
-    while self._dss.get_armed():
-      self.raise_if_aborted()
-      print('Altitude: %5.1f m' % self.get_height(), end='\r')
-      time.sleep(1.0)
+    self._await_disarmed()
     #Wait for the task to finish. Does not use raise if aborted since operator will take controls
     self.await_idling(raise_if_aborted=False)
 
@@ -424,32 +483,18 @@ class Client:
   def rtl(self):
     self._dss.rtl()
     # Wait for rtl to land
-    while self._dss.get_armed():
-      self.raise_if_aborted()
-      print('Altitude: %5.1f m' % self.get_height(), end='\r')
-      time.sleep(1.0)
+    self._await_disarmed()
     #Wait for the task to finish. Does not use raise if aborted since operator will take controls
     self.await_idling(raise_if_aborted=False)
     self._in_controls = False
-    print('\033[K', end='\r') # clear to the end of line
 
   # Engage dss srtl and wait for idle
   def dss_srtl(self, hover_time):
     self._dss.dss_srtl(hover_time)
-    height = 0.0
-    while self._dss.get_armed():
-      self.raise_if_aborted()
-      try:
-        height = self.get_height()
-      except dss.auxiliaries.exception.Nack:
-        pass
-      finally:
-        print('Altitude: %5.1f m' % height, end='\r')
-      time.sleep(1.0)
+    self._await_disarmed()
     #Wait for the task to finish. Does not use raise if aborted since operator will take controls
     self.await_idling(raise_if_aborted=False)
     self._in_controls = False
-    print('\033[K', end='\r') # clear to the end of line
 
   # Get drone armed state
   def is_armed(self):
@@ -1,6 +1,10 @@
 '''CRM client'''
 
 import logging
+import threading
+import time
+
+import zmq
 
 import dss.auxiliaries
 
@@ -9,9 +13,18 @@ __version__ = '1.0.0'
 __copyright__ = 'Copyright (c) 2021, RISE'
 __status__ = 'development'
 
+# Maximum number of CRM requests in flight at the same time
+_POOL_SIZE = 4
+
+# The local copy of the client list is only used while the CRM
+# published its version within this time, it does so at least once a
+# second
+_CLIENTS_MAX_AGE = 3.0 # seconds
+
 class CRM:
   def __init__(self, context, crm, app_name, desc='', app_id=None):
-    '''Either app_id or app_name is required'''
+    '''Either app_id or app_name is required. With context None, the
+    process wide zmq.Context.instance() is used.'''
     self._logger = logging.getLogger(__name__)
     self._logger.info(f'CRM crm_api {dss.auxiliaries.git.describe()}')
 
@@ -19,15 +32,24 @@ class CRM:
     (crm_ip, crm_port) = crm.split(':')
     crm_port = int(crm_port)
 
-    self._context = context
+    self._context = zmq.Context.instance() if context is None else context
     self._ip = crm_ip
     self._port = crm_port
     self._app_name = app_name
     self._desc = desc
     self._app_id = app_id
+    self._queued_calls = []
 
-    # Create request socket, don't start heartbeat thread yet.
-    self._socket = dss.auxiliaries.zmq.Req(self._context, self._ip, self._port, label='crm', timeout=1000)
+    # local copy of the client list, see subscribe_events()
+    self._clients_cache = (None, None) # (version, client list)
+    self._clients_version = (0.0, None) # (time received, version)
+    self._sub_alive = False
+    self._sub_thread = None
+
+    # Create request socket, don't start heartbeat thread yet. Calls
+    # from concurrent threads use extra pooled sockets instead of
+    # queueing behind each other.
+    self._socket = dss.auxiliaries.zmq.Req(self._context, self._ip, self._port, label='crm', timeout=1000, pool_size=_POOL_SIZE)
 
   def __del__(self):
     if hasattr(self, '_socket'): # this is sometimes needed if the __init__ function failed
@@ -53,9 +75,90 @@ class CRM:
   def app_lost(self):
     return self._socket.send_and_receive({'id': self._app_id, 'fcn': 'app_lost'})
 
-  def clients(self, filter=''):
+  def batch(self, calls: list) -> list:
+    '''Sends several requests in one round-trip and returns the replies
+    in the same order. Each call is a request dict, the id defaults to
+    the app id. Falls back to one request per call if the CRM does not
+    support batches.'''
+    calls = [call if 'id' in call else dict(call, id=self._app_id) for call in calls]
+    if not calls:
+      return []
+
+    answer = self._socket.send_and_receive({'id': self._app_id, 'fcn': 'batch', 'calls': calls})
+    if dss.auxiliaries.zmq.is_ack(answer):
+      return answer['replies']
+    return [self._socket.send_and_receive(call) for call in calls]
+
+  def queue_call(self, fcn: str, **kwargs) -> None:
+    '''Queues a request, it is sent with the next flush()'''
+    self._queued_calls.append(dict(kwargs, fcn=fcn))
+
+  def flush(self) -> list:
+    '''Sends all queued requests as one batch, returns the replies'''
+    (calls, self._queued_calls) = (self._queued_calls, [])
+    return self.batch(calls)
+
+  def subscribe_events(self) -> None:
+    '''Follows the version of the client list that the CRM publishes
+    on its info pub socket. clients() then requests the list only when
+    it changed and filters a local copy otherwise. The copy is only
+    filled from acked clients requests of this app. Stop with close()
+    or unregister().'''
+    if self._sub_thread:
+      return
+
+    info = self.get_info()
+    if dss.auxiliaries.zmq.is_nack(info):
+      raise dss.auxiliaries.exception.Nack(dss.auxiliaries.zmq.get_nack_reason(info))
+
+    sub = dss.auxiliaries.zmq.Sub(self._context, self._ip, info['info_pub_port'], label='crm-events', subscribe_all=False)
+    sub.subscribe('clients')
+    self._sub_alive = True
+    self._sub_thread = threading.Thread(target=self._main_events, args=(sub,), daemon=True)
+    self._sub_thread.start()
+
+  def unsubscribe_events(self) -> None:
+    '''Stops following the client list, clients() requests it again'''
+    self._sub_alive = False
+    if self._sub_thread:
+      self._sub_thread.join()
+      self._sub_thread = None
+    self._clients_version = (0.0, None)
+    self._clients_cache = (None, None)
+
+  def close(self) -> None:
+    '''Stops the event thread and closes the socket to the CRM'''
+    self.unsubscribe_events()
+    self._socket.close()
+
+  def _main_events(self, sub) -> None:
+    while self._sub_alive:
+      try:
+        (topic, msg) = sub.recv()
+      except zmq.error.Again:
+        continue # timeout, check if still alive
+      if topic == 'clients':
+        self._clients_version = (time.monotonic(), msg['version'])
+    sub.close()
+
+  def _request_clients(self, filter):
     return self._socket.send_and_receive({'id': self._app_id, 'fcn': 'clients', 'filter': filter})
 
+  def clients(self, filter=''):
+    (updated, version) = self._clients_version
+    if version is None or time.monotonic() - updated > _CLIENTS_MAX_AGE:
+      # not subscribed, or the CRM stopped publishing
+      return self._request_clients(filter)
+
+    (cached_version, client_list) = self._clients_cache
+    if cached_version != version:
+      answer = self._request_clients('')
+      if not dss.auxiliaries.zmq.is_ack(answer, 'clients'):
+        return answer
+      client_list = answer['clients']
+      self._clients_cache = (version, client_list)
+    return dss.auxiliaries.zmq.ack('clients', {'clients': [client for client in client_list if filter in client['id']]})
+
   def delStaleClients(self):
     return self._socket.send_and_receive({'id': self._app_id, 'fcn': 'delStaleClients'})
 
@@ -101,7 +204,7 @@ class CRM:
       answer = self._socket.send_and_receive({'fcn': 'unregister', 'id': self._app_id})
     else:
       answer = dss.auxiliaries.zmq.ack('unregister')
-    self._socket.close()
+    self.close()
     return answer
 
   def upgrade(self, virgin : bool=False):
@@ -52,8 +52,8 @@ class DSS:
     call = 'heart_beat'
     # build message
     msg = {'fcn': call, 'id': self._app_id}
-    # send and receive message
-    answer = self._socket.send_and_receive(msg)
+    # send and receive message, the encoded request is cached
+    answer = self._socket.send_and_receive(msg, dss.auxiliaries.zmq.request_bytes(call, self._app_id))
     # handle nack
     if not dss.auxiliaries.zmq.is_ack(answer, call):
       raise dss.auxiliaries.exception.Nack(dss.auxiliaries.zmq.get_nack_reason(answer), fcn=call)
@@ -64,8 +64,8 @@ class DSS:
     call = 'get_info'
     # build message
     msg = {'fcn': call, 'id': self._app_id}
-    # send and receive message
-    answer = self._socket.send_and_receive(msg)
+    # send and receive message, the encoded request is cached
+    answer = self._socket.send_and_receive(msg, dss.auxiliaries.zmq.request_bytes(call, self._app_id))
     # handle nack
     if not dss.auxiliaries.zmq.is_ack(answer, call):
       raise dss.auxiliaries.exception.Nack(dss.auxiliaries.zmq.get_nack_reason(answer), fcn=call)
@@ -79,8 +79,8 @@ class DSS:
     call = 'who_controls'
     # build message
     msg = {'fcn': call, 'id': self._app_id}
-    # send and receive message
-    answer = self._socket.send_and_receive(msg)
+    # send and receive message, the encoded request is cached
+    answer = self._socket.send_and_receive(msg, dss.auxiliaries.zmq.request_bytes(call, self._app_id))
     # handle nack
     if not dss.auxiliaries.zmq.is_ack(answer, call):
       raise dss.auxiliaries.exception.Nack(dss.auxiliaries.zmq.get_nack_reason(answer), fcn=call)
@@ -91,8 +91,8 @@ class DSS:
     call = 'get_owner'
     # build message
     msg = {'fcn': call, 'id': self._app_id}
-    # send and receive message
-    answer = self._socket.send_and_receive(msg)
+    # send and receive message, the encoded request is cached
+    answer = self._socket.send_and_receive(msg, dss.auxiliaries.zmq.request_bytes(call, self._app_id))
     # handle nack
     if not dss.auxiliaries.zmq.is_ack(answer, call):
       raise dss.auxiliaries.exception.Nack(dss.auxiliaries.zmq.get_nack_reason(answer), fcn=call)
@@ -103,8 +103,8 @@ class DSS:
     call = 'set_owner'
     # build message
     msg = {'fcn': call, 'id': self._app_id}
-    # send and receive message
-    answer = self._socket.send_and_receive(msg)
+    # send and receive message, the encoded request is cached
+    answer = self._socket.send_and_receive(msg, dss.auxiliaries.zmq.request_bytes(call, self._app_id))
     # handle nack
     if not dss.auxiliaries.zmq.is_ack(answer, call):
       raise dss.auxiliaries.exception.Nack(dss.auxiliaries.zmq.get_nack_reason(answer), fcn=call)
@@ -130,8 +130,8 @@ class DSS:
     call = 'get_idle'
     # build message
     msg = {'fcn': call, 'id': self._app_id}
-    # send and receive message
-    answer = self._socket.send_and_receive(msg)
+    # send and receive message, the encoded request is cached
+    answer = self._socket.send_and_receive(msg, dss.auxiliaries.zmq.request_bytes(call, self._app_id))
     # handle nack
     if not dss.auxiliaries.zmq.is_ack(answer, call):
       raise dss.auxiliaries.exception.Nack(dss.auxiliaries.zmq.get_nack_reason(answer), fcn=call)
@@ -155,8 +155,8 @@ class DSS:
     call = 'reset_dss_srtl'
     # build message
     msg = {'fcn': call, 'id': self._app_id}
-    # send and receive message
-    answer = self._socket.send_and_receive(msg)
+    # send and receive message, the encoded request is cached
+    answer = self._socket.send_and_receive(msg, dss.auxiliaries.zmq.request_bytes(call, self._app_id))
     # handle nack
     if not dss.auxiliaries.zmq.is_ack(answer, call):
       raise dss.auxiliaries.exception.Nack(dss.auxiliaries.zmq.get_nack_reason(answer), fcn=call)
@@ -180,8 +180,8 @@ class DSS:
     call = 'land'
     # build message
     msg = {'fcn': call, 'id': self._app_id}
-    # send and receive message
-    answer = self._socket.send_and_receive(msg)
+    # send and receive message, the encoded request is cached
+    answer = self._socket.send_and_receive(msg, dss.auxiliaries.zmq.request_bytes(call, self._app_id))
     # handle nack
     if not dss.auxiliaries.zmq.is_ack(answer, call):
       raise dss.auxiliaries.exception.Nack(dss.auxiliaries.zmq.get_nack_reason(answer), fcn=call)
@@ -192,8 +192,8 @@ class DSS:
     call = 'rtl'
     # build message
     msg = {'fcn': call, 'id': self._app_id}
-    # send and receive message
-    answer = self._socket.send_and_receive(msg)
+    # send and receive message, the encoded request is cached
+    answer = self._socket.send_and_receive(msg, dss.auxiliaries.zmq.request_bytes(call, self._app_id))
     # handle nack
     if not dss.auxiliaries.zmq.is_ack(answer, call):
       raise dss.auxiliaries.exception.Nack(dss.auxiliaries.zmq.get_nack_reason(answer), fcn=call)
@@ -398,8 +398,8 @@ class DSS:
     call = 'get_armed'
     # build message
     msg = {'fcn': call, 'id': self._app_id}
-    # send and receive message
-    answer = self._socket.send_and_receive(msg)
+    # send and receive message, the encoded request is cached
+    answer = self._socket.send_and_receive(msg, dss.auxiliaries.zmq.request_bytes(call, self._app_id))
     # handle nack
     if not dss.auxiliaries.zmq.is_ack(answer, call):
       raise dss.auxiliaries.exception.Nack(dss.auxiliaries.zmq.get_nack_reason(answer), fcn=call)
@@ -410,8 +410,8 @@ class DSS:
     call = 'get_currentWP'
     # build message
     msg = {'fcn': call, 'id': self._app_id}
-    # send and receive message
-    answer = self._socket.send_and_receive(msg)
+    # send and receive message, the encoded request is cached
+    answer = self._socket.send_and_receive(msg, dss.auxiliaries.zmq.request_bytes(call, self._app_id))
     # handle nack
     if not dss.auxiliaries.zmq.is_ack(answer, call):
       raise dss.auxiliaries.exception.Nack(dss.auxiliaries.zmq.get_nack_reason(answer), fcn=call)
@@ -422,8 +422,8 @@ class DSS:
     call = 'get_flightmode'
     # build message
     msg = {'fcn': call, 'id': self._app_id}
-    # send and receive message
-    answer = self._socket.send_and_receive(msg)
+    # send and receive message, the encoded request is cached
+    answer = self._socket.send_and_receive(msg, dss.auxiliaries.zmq.request_bytes(call, self._app_id))
     # handle nack
     if not dss.auxiliaries.zmq.is_ack(answer, call):
       raise dss.auxiliaries.exception.Nack(dss.auxiliaries.zmq.get_nack_reason(answer), fcn=call)
@@ -448,8 +448,8 @@ class DSS:
     call = 'get_posD'
     # build message
     msg = {'fcn': call, 'id': self._app_id}
-    # send and receive message
-    answer = self._socket.send_and_receive(msg)
+    # send and receive message, the encoded request is cached
+    answer = self._socket.send_and_receive(msg, dss.auxiliaries.zmq.request_bytes(call, self._app_id))
     # handle nack
     if not dss.auxiliaries.zmq.is_ack(answer, call):
       raise dss.auxiliaries.exception.Nack(dss.auxiliaries.zmq.get_nack_reason(answer), fcn=call)
@@ -473,8 +473,8 @@ class DSS:
     call = 'disconnect'
     # build message
     msg = {'fcn': call, 'id': self._app_id}
-    # send and receive message
-    answer = self._socket.send_and_receive(msg)
+    # send and receive message, the encoded request is cached
+    answer = self._socket.send_and_receive(msg, dss.auxiliaries.zmq.request_bytes(call, self._app_id))
     # handle nack
     if not dss.auxiliaries.zmq.is_ack(answer, call):
       raise dss.auxiliaries.exception.Nack(dss.auxiliaries.zmq.get_nack_reason(answer), fcn=call)
@@ -40,7 +40,7 @@ class UsspClientLib:
     self._logger = logging.getLogger(__name__)
     self._logger.info('U-space Client Lib')
 
-    self._context = context if context else zmq.Context()
+    self._context = zmq.Context.instance() if context is None else context
     self._ussp_client = None
     self._app_id = app_id
     self._nrid_msgs = {}
@@ -21,7 +21,7 @@ try:
   sys.path.append('/home/pi/rise_drones_dev/modem')
   from modem import Modem
 except ImportError:
-  print('No module modem found. RISE proprietary code')
+  Modem = None
 
 __author__ = 'Lennart Ochel <lennart.ochel@ri.se>, Andreas Gising <andreas.gising@ri.se>, Kristoffer Bergman <kristoffer.bergman@ri.se>, Hanna Müller <hanna.muller@ri.se>, Joel Nordahl'
 __version__ = '1.1.0'
@@ -968,6 +968,10 @@ class Server:
     '''Monitors and logs the network status'''
     self._logger.info("MODEM: Network logger thread enabled")
 
+    if Modem is None:
+      self._logger.warning('MODEM: No module modem found. RISE proprietary code. Quit network logger thread')
+      return
+
     # Connect to modem on specified path
     try:
       self._modem = Modem("/dev/ttyUSB2")
@@ -1006,7 +1010,7 @@ class Server:
           # Manually add the key to prevent the final curly bracket
           outfile.write('{ "static_info":')
           # Write the log_item as a string under the newly added key
-          outfile.write(json.dumps(static))
+          json.dump(static, outfile)
 
     # Wait for vehicle to arm
     while not self._hexa.is_armed():
@@ -1018,6 +1022,7 @@ class Server:
     t_sleep = 1
     t_landed_threshold = 15/t_sleep # Unit seconds
     while t_landed < t_landed_threshold :
+        t_start = time.monotonic()
         if self._hexa.flying_state == 'landed':
           t_landed += t_sleep
         else:
@@ -1027,22 +1032,16 @@ class Server:
 
         # Add pos data
         pos = self._hexa.get_position_lla_global()
-        log_item['pos'] = {}
-        log_item['pos']['lat'] = pos.lat
-        log_item['pos']['long'] = pos.lon
-        log_item['pos']['alt'] = pos.alt
-        log_item['pos']['fix_type'] = self._hexa.gnss_state_str
+        log_item['pos'] = {'lat': pos.lat, 'long': pos.lon, 'alt': pos.alt, 'fix_type': self._hexa.gnss_state_str}
 
         # Save the log_item under a new key in the log file built line by line
         with open(log_items, 'a', encoding="utf-8") as outfile:
-          # Write comma to previous line
-          outfile.write(',')
-          # Add a new numbered key manually
-          new_key = '"' + str(index) + '"' + ':'
-          outfile.write(new_key)
+          # Write comma to previous line and add a new numbered key manually
+          outfile.write(f',"{index}":')
           # write the log_item as a string under the newly added key
-          outfile.write(json.dumps(log_item))
-        time.sleep(t_sleep)
+          json.dump(log_item, outfile)
+        # Compensate for the time spent polling the modem
+        time.sleep(max(0, t_sleep - (time.monotonic() - t_start)))
         index+=1
 
     # Add the final curly bracket
@@ -1053,8 +1052,7 @@ class Server:
     with open(log_items, 'r', encoding="utf-8") as infile:
       big_json = json.load(infile)
       with open(log_file, 'w', encoding="utf-8") as outfile:
-        log_str = json.dumps(big_json, indent=4)
-        outfile.write(log_str)
+        json.dump(big_json, outfile, indent=4)
     self._logger.info("MODEM: Logging complete!")
 
   #############################################################################
@@ -1148,7 +1146,6 @@ class Server:
       #####
       try:
         msg = self._serv_socket.recv_json()
-        msg = json.loads(msg)
         if self.from_owner(msg):
           self._t_last_owner_msg = time.time()
       except zmq.error.Again:
@@ -1191,7 +1188,6 @@ class Server:
         print(fcn)
         answer = {'fcn': 'nack', 'arg': msg['fcn'], 'arg2': 'request not supported'}
 
-      answer = json.dumps(answer)
       self._serv_socket.send_json(answer)
 
       if fcn != 'heart_beat':
@@ -15,6 +15,14 @@ import dronekit
 import numpy as np
 from pymavlink import mavutil
 
+# numba is optional and not in requirements.txt, install it to compile
+# the control loop kernels. Without it they run as plain Python.
+try:
+  from numba import njit
+except ImportError:
+  def njit(*_args, **_kwargs):
+    return lambda fcn: fcn
+
 import dss.auxiliaries
 from dss.auxiliaries.config import config
 
@@ -37,14 +45,62 @@ def get_distance(location1, location2):
   original_lat = location1.lat
   dlat = location2.lat - location1.lat
   dlong = location2.lon - location1.lon
-  return math.sqrt(dlat**2 + (dlong*math.cos(math.pi*original_lat/180))**2) * 1.11194444444e5
+  return math.hypot(dlat, dlong*math.cos(math.pi*original_lat/180)) * 1.11194444444e5
+
+def lla_to_ne(lat, lon, lat0, lon0, cos_lat0=None):
+  '''
+  Returns the north and east offsets in metres from (lat0, lon0) to
+  (lat, lon). lat and lon may be numpy arrays to convert several
+  positions at once. Pass cos_lat0 to reuse it for the same origin.
+  '''
+  if cos_lat0 is None:
+    cos_lat0 = math.cos(lat0/180*math.pi)
+  # 1852 * 60 - nautical mile times 60 -> length of 1 arch in m.
+  return (lat - lat0)*111120, (lon - lon0)*111120*cos_lat0
+
+def ne_to_lla(north, east, lat0, lon0, cos_lat0=None):
+  '''Inverse of lla_to_ne(), returns the latitude and longitude'''
+  if cos_lat0 is None:
+    cos_lat0 = math.cos(lat0/180*math.pi)
+  return lat0 + north/111120, lon0 + east/(111120*cos_lat0)
+
+@njit(cache=True)
+def _lookahead_kernel(p1_n, p1_e, p1_alt, p2_n, p2_e, p2_alt, alt, lookahead_dist):
+  '''
+  Projects the current position (0, 0, alt) to the line between p1 and p2
+  and moves the projection along the line until it is lookahead_dist
+  away. Same math as Hexacopter.project_point, in scalars so numba can
+  compile it. Returns the lookahead point as (north, east, alt).
+  '''
+  d_n = p2_n - p1_n
+  d_e = p2_e - p1_e
+  d_alt = p2_alt - p1_alt
+  #squared distance between p1 and p2
+  l2 = d_n*d_n + d_e*d_e + d_alt*d_alt
+  if l2 == 0:
+    return (p1_n, p1_e, p1_alt)
+  #Make sure that the projected point is on the line segment
+  t = max(0.0, min(1.0, (-p1_n*d_n - p1_e*d_e + (alt - p1_alt)*d_alt) / l2))
+  proj_n = p1_n + t*d_n
+  proj_e = p1_e + t*d_e
+  proj_alt = p1_alt + t*d_alt
+  #Compute distance to projected point
+  d1 = math.sqrt(proj_n*proj_n + proj_e*proj_e + (proj_alt - alt)**2)
+  if d1 < lookahead_dist:
+    #Compute remaining distance along the direction towards p2
+    d_wp = math.sqrt(l2)
+    d2 = math.sqrt(lookahead_dist**2 - d1**2)
+    proj_n += d2/d_wp*d_n
+    proj_e += d2/d_wp*d_e
+    proj_alt += d2/d_wp*d_alt
+  return (proj_n, proj_e, proj_alt)
 
 def bearing_deg(delta_east : float, delta_north : float) -> float:
   '''
   Calculates the bearing to a relative posisiton given the delta east
   and delta north to that point. Returned value is in degrees, [0-359]
   '''
-  bearing = math.atan2(delta_east, delta_north)/math.pi*180
+  bearing = math.degrees(math.atan2(delta_east, delta_north))
   if bearing < 0:
     bearing += 360
 
@@ -86,28 +142,17 @@ class Waypoint:
     northing = dlat * 1852 * 60
     easting = dlon *1852 * 60 * math.cos(self.lat/180*math.pi)
 
-    # Calc squares
-    northing2 = northing**2
-    easting2 = easting**2
-    dAlt2 = dalt**2
-
     # Calc distances
-    distance2D = math.sqrt(northing2 + easting2)
-    distance3D = math.sqrt(northing2 + easting2 + dAlt2)
+    distance2D = math.hypot(northing, easting)
+    distance3D = math.hypot(northing, easting, dalt)
 
     # Calc bearing
     # Guard division by 0 and calculate: Bearing given northing and easting
     # Case easting == 0, i.e. bearing == 0 or -180
-    bearing = 0
     if easting == 0:
-      if northing > 0:
-        bearing = 0
-      else:
-        bearing = 180
-    elif easting > 0:
-      bearing = (math.pi/2 - math.atan(northing/easting))/math.pi*180
-    elif easting < 0:
-      bearing = -(math.pi/2 + math.atan(northing/easting))/math.pi*180
+      bearing = 0 if northing > 0 else 180
+    else:
+      bearing = math.degrees(math.atan2(easting, northing))
 
     return (northing, easting, dalt, distance2D, distance3D, bearing)
 
@@ -428,8 +473,6 @@ class Hexacopter:
 
     # Parse heading
     wp.heading = self.parse_heading(jsonWP)
-    # Get initial lat in radians
-    init_lat_rad = self.init_point_wp.lat/180 * math.pi
     # Get initial heading in radians
     init_heading_rad = self.init_point_wp.heading/180*math.pi
     # Parse wp coordinates and convert to LLA
@@ -448,8 +491,7 @@ class Hexacopter:
       east = jsonWP['east']
       down = jsonWP['down']
       # Calc lat, lon from north east and init_point.
-      wp.lat = self.init_point_wp.lat + north/111120 # 1852 * 60 - nautical mile times 60 -> length of 1 arch in m.
-      wp.lon = self.init_point_wp.lon + east/(111120 * math.cos(init_lat_rad))
+      (wp.lat, wp.lon) = ne_to_lla(north, east, self.init_point_wp.lat, self.init_point_wp.lon)
       wp.alt = -down
     elif "x" in jsonWP and "y" in jsonWP and "z" in jsonWP:
       x = jsonWP['x']
@@ -459,9 +501,8 @@ class Hexacopter:
       beta = -init_heading_rad
       north = x * math.cos(beta) + y * math.sin(beta)
       east = -x * math.sin(beta) + y * math.cos(beta)
-      # Calc lat, lon from north east and init_point (duplicate of above)
-      wp.lat = self.init_point_wp.lat + north/111120 # 1852 * 60 - nautical mile times 60 -> length of 1 arch in m.
-      wp.lon = self.init_point_wp.lon + east/(111120 * math.cos(init_lat_rad))
+      # Calc lat, lon from north east and init_point
+      (wp.lat, wp.lon) = ne_to_lla(north, east, self.init_point_wp.lat, self.init_point_wp.lon)
       wp.alt = -z
       # Heading is parsed above but need correction for local reference system if positive
       if wp.heading >= 0:
@@ -649,45 +690,39 @@ class Hexacopter:
   @staticmethod
   def project_point(p1, p2, p3):
     '''Project point p3 to the line between p1 and p2'''
+    # Scalar math, numpy dispatch dominates for 3-vectors
+    (p1x, p1y, p1z) = p1
+    (p2x, p2y, p2z) = p2
+    (p3x, p3y, p3z) = p3
+    dx = p2x - p1x
+    dy = p2y - p1y
+    dz = p2z - p1z
     #squared distance between p1 and p2
-    l2 = np.sum((p1-p2)**2)
+    l2 = dx*dx + dy*dy + dz*dz
     if l2 == 0:
       return p1
     #The line extending the segment is parameterized as p1 + t (p2 - p1).
     #The projection falls where t = [(p3-p1) . (p2-p1)] / |p2-p1|^2
     #Make sure that the projected line is on the line segment
-    t = max(0, min(1, np.sum((p3 - p1) * (p2 - p1)) / l2))
-    projection = p1 + t * (p2 - p1)
-    return projection
+    t = max(0, min(1, ((p3x - p1x)*dx + (p3y - p1y)*dy + (p3z - p1z)*dz) / l2))
+    return np.array([p1x + t*dx, p1y + t*dy, p1z + t*dz])
 
   def compute_lookahead_wp(self, prev_wp, next_wp) -> Waypoint:
     curr_location = self.get_position_lla()
-    # Transform to euclidean frame (origin = current location)
-    wp1_n = (prev_wp.lat - curr_location.lat)*1852*60
-    wp1_e = (prev_wp.lon - curr_location.lon)*1852*60*math.cos(curr_location.lat/180*math.pi)
-    wp2_n = (next_wp.lat - curr_location.lat)*1852*60
-    wp2_e = (next_wp.lon - curr_location.lon)*1852*60*math.cos(curr_location.lat/180*math.pi)
-    # project current position (lat, lon) to the line between prev_wp and next_wp
-    p1 = np.array([wp1_n, wp1_e, prev_wp.alt])
-    p2 = np.array([wp2_n, wp2_e, next_wp.alt])
-    p_c = np.array([0.0, 0.0, curr_location.alt])
-
-    proj_point = self.project_point(p1, p2, p_c)
-    #Compute distance to projected point
-    d1 = math.sqrt(np.sum((proj_point - p_c)**2))
-    d2 = 0.0
-    if d1 < self.lookahead_dist :
-      #Compute direction towards next waypoint
-      d_wp = math.sqrt(np.sum((p2-p1)**2))
-      if d_wp > 0 :
-        #Compute remaining distance
-        d2 = math.sqrt(self.lookahead_dist**2 - d1**2)
-        # Compute new coordinates for lookahead (North, East)
-        proj_point = proj_point + (d2/d_wp)*(p2-p1)
-    lookahead_wp = copy.deepcopy(next_wp)
+    # Same origin for all conversions below
+    cos_lat0 = math.cos(curr_location.lat/180*math.pi)
+    # Transform both waypoints to euclidean frame (origin = current location),
+    # scalar math, numpy arrays of two elements only add overhead
+    (prev_n, prev_e) = lla_to_ne(prev_wp.lat, prev_wp.lon, curr_location.lat, curr_location.lon, cos_lat0)
+    (next_n, next_e) = lla_to_ne(next_wp.lat, next_wp.lon, curr_location.lat, curr_location.lon, cos_lat0)
+    # Project and compute the lookahead point in (North, East, alt)
+    proj_point = _lookahead_kernel(prev_n, prev_e, prev_wp.alt,
+                                   next_n, next_e, next_wp.alt,
+                                   curr_location.alt, self.lookahead_dist)
+    # All attributes are immutable scalars, a shallow copy suffices
+    lookahead_wp = copy.copy(next_wp)
     # Compute the lookahead latitude and longitude
-    lookahead_wp.lat = curr_location.lat + proj_point[0]/(1852*60)
-    lookahead_wp.lon = curr_location.lon + proj_point[1]/(1852*60*math.cos(curr_location.lat/180*math.pi))
+    (lookahead_wp.lat, lookahead_wp.lon) = ne_to_lla(proj_point[0], proj_point[1], curr_location.lat, curr_location.lon, cos_lat0)
     lookahead_wp.alt = proj_point[2]
     return lookahead_wp
 
@@ -1302,14 +1337,10 @@ class Hexacopter:
     self.send_body_velocity(0,0,0)
     self.send_yaw_rate(0)
 
-  # Returns angle in range [-180 180]
-  def get_angle_in_range(self, angle):
-    angle2 = angle % 360
-    if angle2 > 180:
-      angle2 -= 360
-    if angle2 < -180:
-      angle2 += 360
-    return angle2
+  # Returns angle in range (-180 180], also works element-wise on numpy arrays
+  @staticmethod
+  def get_angle_in_range(angle):
+    return 180 - (180 - angle) % 360
 
   def follow_stream(self):
     # Follow stream
@@ -134,7 +134,7 @@ class Server:
 
     while self.alive:
       try:
-        message = str(socket.recv(), 'utf-8')
+        message = socket.recv()
       except zmq.error.Again:
         pass
       else:
@@ -163,7 +163,10 @@ class Server:
         except zmq.error.Again:
           continue
 
-        msg = json.loads(msg)
+        # older clients encode the request twice, reply the same way
+        wrapped = isinstance(msg, str)
+        if wrapped:
+          msg = json.loads(msg)
         fcn = msg['fcn'] if 'fcn' in msg else ''
 
         self._logger.info('Message received: %s', msg)
@@ -180,8 +183,7 @@ class Server:
 
         self._logger.info('Answer: %s', answer)
 
-        answer = json.dumps(answer)
-        self._serv_socket.send_json(answer)
+        self._serv_socket.send_json(json.dumps(answer) if wrapped else answer)
     except KeyboardInterrupt:
       self.alive = False
 